@@ -1,14 +1,15 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import Config
 import os
 
-db = SQLAlchemy()
-migrate = Migrate()
-jwt = JWTManager()
+def __getattr__(name):
+    # db, migrate and jwt live in app.extensions and are only imported on
+    # first use, so read-only apps never load SQLAlchemy or JWT
+    if name in ('db', 'migrate', 'jwt'):
+        from app import extensions
+        return getattr(extensions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -18,17 +19,22 @@ def create_app(config_class=Config):
     images_dir = os.path.join(app.static_folder, 'animal-images')
     os.makedirs(images_dir, exist_ok=True)
 
-    # Initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
-    jwt.init_app(app)
+    read_only = app.config['READ_ONLY']
+
+    # Initialize extensions (skipped entirely in read-only mode)
+    if not read_only:
+        from app.extensions import db, migrate, jwt
+        db.init_app(app)
+        migrate.init_app(app, db)
+        jwt.init_app(app)
+        from app import models
     
     # Configure CORS to allow requests from frontend
     allowed_origins = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
     CORS(app, resources={
         r"/api/*": {
             "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE"],
+            "methods": ["GET"] if read_only else ["GET", "POST", "PUT", "DELETE"],
             "allow_headers": ["Content-Type", "Authorization"]
         }
     })
@@ -37,19 +43,43 @@ def create_app(config_class=Config):
     from app.api import bp as api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
 
+    if not read_only:
+        from app.api import write_bp, auth, writes
+        app.register_blueprint(write_bp, url_prefix='/api')
+
+    # Per-request profiling hooks
+    if app.config['PROFILING_ENABLED']:
+        from app.profiling import init_profiling
+        init_profiling(app)
+
     # Register error handlers
     from app.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
 
-    # Initialize data from JSON
-    from app.data_loader import load_animals_from_csv
+    # Register datasets and load the first one from JSON; the others are
+    # loaded on first use
+    from app.data_loader import configure_catalog, load_animals_from_csv
+    from app.journal import journal
+    journal.max_entries = app.config['SYNC_JOURNAL_MAX_ENTRIES']
     with app.app_context():
+        configure_catalog(catalog_file=app.config['CATALOG_FILE'],
+                          memory_budget=app.config['CATALOG_MEMORY_BUDGET_MB'] * 1024 * 1024,
+                          workers=app.config['INGEST_WORKERS'],
+                          batch_size=app.config['INGEST_BATCH_SIZE'],
+                          related_k=app.config['RELATED_TOP_K'],
+                          photo_manifest_path=app.config['PHOTO_MANIFEST'],
+                          photo_workers=app.config['PHOTO_WORKERS'])
         print("Loading animals data...")
         if load_animals_from_csv():
             print("Animals data loaded successfully")
         else:
             print("Failed to load animals data")
 
-    return app
+        if app.config.get('SIGHTINGS_FILE'):
+            from app.heatmap import load_sightings
+            if os.path.exists(app.config['SIGHTINGS_FILE']):
+                print(load_sightings(app.config['SIGHTINGS_FILE']).summary())
+            else:
+                print(f"Warning: sightings file not found at {app.config['SIGHTINGS_FILE']}")
 
-from app import models 
\ No newline at end of file
+    return app
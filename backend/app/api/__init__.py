@@ -1,5 +1,11 @@
 from flask import Blueprint
 
+# Public read routes, served from the data loader only
 bp = Blueprint('api', __name__)
 
-from app.api import auth, animals, regions 
\ No newline at end of file
+# Auth and write routes needing the database and JWT. Their modules
+# (app.api.auth, app.api.writes) are imported by create_app only when the
+# app is not in read-only mode.
+write_bp = Blueprint('api_write', __name__)
+
+from app.api import animals, regions, heatmap, datasets, sync, profiling
\ No newline at end of file
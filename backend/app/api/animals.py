@@ -1,16 +1,13 @@
 from flask import jsonify, request
-from flask_jwt_extended import jwt_required
-from app import db
 from app.api import bp
-from app.models import Animal, Region
-from app.api.decorators import admin_required
-from app.data_loader import get_all_animals
+from app.data_loader import default_dataset_name, get_all_animals, get_animal as find_animal, get_related_animals
 
 @bp.route('/animals', methods=['GET'])
 def get_animals():
     try:
-        # Get all animals from our JSON data
-        animals = get_all_animals()
+        # Get all animals of one dataset (the default one unless ?dataset= is given)
+        dataset = request.args.get('dataset') or default_dataset_name()
+        animals = get_all_animals(dataset)
         print(f"Retrieved {len(animals)} animals from data loader")
         
         if not animals:
@@ -20,6 +17,7 @@ def get_animals():
             }), 404
             
         return jsonify({
+            'dataset': dataset,
             'items': animals,
             'total': len(animals)
         })
@@ -35,11 +33,8 @@ def get_animals():
 @bp.route('/animals/<int:id>', methods=['GET'])
 def get_animal(id):
     try:
-        # Get all animals from our JSON data
-        animals = get_all_animals()
-        
-        # Find the animal with the matching ID
-        animal = next((animal for animal in animals if animal['id'] == id), None)
+        # Find the animal with the matching ID in the dataset owning it
+        animal = find_animal(id)
         
         if not animal:
             return jsonify({
@@ -67,73 +62,33 @@ def get_animal(id):
             'error': 'Failed to load animal details'
         }), 500
 
-@bp.route('/animals', methods=['POST'])
-@jwt_required()
-@admin_required
-def create_animal():
-    data = request.get_json()
-    
-    animal = Animal(
-        name=data['name'],
-        scientific_name=data.get('scientific_name'),
-        description=data.get('description'),
-        risk_level=data.get('risk_level'),
-        image_url=data.get('image_url')
-    )
-    
-    if 'region_ids' in data:
-        regions = Region.query.filter(Region.id.in_(data['region_ids'])).all()
-        animal.regions = regions
-    
-    db.session.add(animal)
-    db.session.commit()
-    
-    return jsonify({
-        'id': animal.id,
-        'name': animal.name,
-        'message': 'Animal created successfully'
-    }), 201
-
-@bp.route('/animals/<int:id>', methods=['PUT'])
-@jwt_required()
-@admin_required
-def update_animal(id):
-    animal = Animal.query.get_or_404(id)
-    data = request.get_json()
-    
-    animal.name = data.get('name', animal.name)
-    animal.scientific_name = data.get('scientific_name', animal.scientific_name)
-    animal.description = data.get('description', animal.description)
-    animal.risk_level = data.get('risk_level', animal.risk_level)
-    animal.image_url = data.get('image_url', animal.image_url)
-    
-    if 'region_ids' in data:
-        regions = Region.query.filter(Region.id.in_(data['region_ids'])).all()
-        animal.regions = regions
-    
-    db.session.commit()
-    
-    return jsonify({
-        'message': 'Animal updated successfully'
-    })
-
-@bp.route('/animals/<int:id>', methods=['DELETE'])
-@jwt_required()
-@admin_required
-def delete_animal(id):
-    animal = Animal.query.get_or_404(id)
-    db.session.delete(animal)
-    db.session.commit()
+@bp.route('/animals/<int:id>/related', methods=['GET'])
+def get_related(id):
+    k = request.args.get('k', 5, type=int)
+    if k < 1:
+        return jsonify({
+            'error': 'k must be a positive integer'
+        }), 400
     
+    # Served from the neighbor lists computed when the dataset was loaded
+    related = get_related_animals(id, k)
+    if related is None:
+        return jsonify({
+            'error': 'Animal not found'
+        }), 404
+        
     return jsonify({
-        'message': 'Animal deleted successfully'
+        'id': id,
+        'items': related,
+        'total': len(related)
     })
 
 @bp.route('/all-animals', methods=['GET'])
 def get_all_animals_endpoint():
     try:
-        # Get all animals from our JSON data
-        animals = get_all_animals()
+        # Get all animals of one dataset (the default one unless ?dataset= is given)
+        dataset = request.args.get('dataset') or default_dataset_name()
+        animals = get_all_animals(dataset)
         print(f"Retrieved {len(animals)} animals from data loader")
         
         if not animals:
@@ -143,6 +98,7 @@ def get_all_animals_endpoint():
             }), 404
             
         return jsonify({
+            'dataset': dataset,
             'items': animals,
             'total': len(animals)
         })
@@ -1,7 +1,7 @@
 from flask import jsonify, request
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app import db
-from app.api import bp
+from app.api import write_bp as bp
 from app.models import User
 
 @bp.route('/auth/register', methods=['POST'])
@@ -0,0 +1,14 @@
+from flask import jsonify
+from app.api import bp
+from app.data_loader import catalog
+
+@bp.route('/datasets', methods=['GET'])
+def get_datasets():
+    # Directory listing only; does not load any dataset
+    datasets = catalog.datasets()
+    return jsonify({
+        'items': [dataset.to_dict() for dataset in datasets],
+        'total': len(datasets),
+        'loaded_bytes': catalog.loaded_size(),
+        'memory_budget_bytes': catalog.memory_budget
+    })
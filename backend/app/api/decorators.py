@@ -1,16 +1,32 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from app.models import User
+from flask import current_app, jsonify, request
+from app.profiling import TOKEN_HEADER, token_is_valid
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        # Imported here so read-only apps never load JWT or the models
+        from flask_jwt_extended import get_jwt_identity
+        from app.models import User
+        
         user_id = get_jwt_identity()
         user = User.query.get(user_id)
         
         if not user or user.role != 'admin':
             return jsonify({'error': 'Admin privileges required'}), 403
         
+        return f(*args, **kwargs)
+    return decorated_function
+
+def profiling_token_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Hide the profiling surface entirely unless it is enabled
+        if not current_app.config.get('PROFILING_ENABLED'):
+            return jsonify({'error': 'Not found'}), 404
+        
+        if not token_is_valid(request.headers.get(TOKEN_HEADER)):
+            return jsonify({'error': 'Valid profiling token required'}), 403
+        
         return f(*args, **kwargs)
     return decorated_function
\ No newline at end of file
@@ -0,0 +1,37 @@
+from flask import current_app, jsonify, request
+from app.api import bp
+from app.data_loader import get_animal_ids_by_risk
+from app.heatmap import sightings
+
+@bp.route('/heatmap', methods=['GET'])
+def get_heatmap():
+    zoom = request.args.get('zoom', 6, type=int)
+    animal_id = request.args.get('animal_id', type=int)
+    risk_level = request.args.get('risk_level')
+
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = tuple(float(v) for v in request.args['bbox'].split(','))
+        except ValueError:
+            bbox = ()
+        if len(bbox) != 4:
+            return jsonify({
+                'error': 'bbox must be "west,south,east,north"'
+            }), 400
+    elif zoom > current_app.config['HEATMAP_MAX_ZOOM_WITHOUT_BBOX']:
+        return jsonify({
+            'error': f"bbox is required above zoom {current_app.config['HEATMAP_MAX_ZOOM_WITHOUT_BBOX']}"
+        }), 400
+
+    # Resolve the animal filters to a list of ids
+    animal_ids = None
+    if animal_id is not None:
+        animal_ids = [animal_id]
+    if risk_level:
+        matching = get_animal_ids_by_risk(risk_level, request.args.get('dataset'))
+        animal_ids = matching if animal_ids is None else \
+            [id for id in animal_ids if id in matching]
+
+    return jsonify(sightings.heatmap(zoom, bbox=bbox, animal_ids=animal_ids,
+                                     max_cells=current_app.config['HEATMAP_MAX_CELLS']))
@@ -0,0 +1,63 @@
+import math
+from flask import current_app, jsonify, request, send_from_directory
+from app.api import bp
+from app.api.decorators import profiling_token_required
+from app.profiling import span_stats, window_sampler, list_profiles, COLLAPSED_SUFFIX, MIN_INTERVAL
+
+@bp.route('/profiling/spans', methods=['GET'])
+@profiling_token_required
+def get_spans():
+    return jsonify({
+        'items': [{
+            'name': name,
+            'count': stats['count'],
+            'total_seconds': stats['total'],
+            'mean_seconds': stats['total'] / stats['count'],
+            'max_seconds': stats['max'],
+            'last_seconds': stats['last']
+        } for name, stats in sorted(span_stats.items())]
+    })
+
+@bp.route('/profiling/sampler', methods=['GET'])
+@profiling_token_required
+def get_sampler():
+    return jsonify(window_sampler.status())
+
+@bp.route('/profiling/sampler', methods=['POST'])
+@profiling_token_required
+def start_sampler():
+    data = request.get_json(silent=True) or {}
+    max_seconds = current_app.config['PROFILING_MAX_WINDOW_SECONDS']
+    try:
+        seconds = min(float(data.get('seconds', 30)), max_seconds)
+        interval = float(data.get('interval', current_app.config['PROFILING_INTERVAL']))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    if not (math.isfinite(seconds) and math.isfinite(interval)) or seconds <= 0 or interval <= 0:
+        return jsonify({'error': 'seconds and interval must be positive'}), 400
+    interval = max(interval, MIN_INTERVAL)
+
+    if not window_sampler.start(seconds, interval, current_app.config['PROFILING_DIR']):
+        return jsonify({'error': 'A profiling window is already running'}), 409
+
+    return jsonify({
+        'message': f'Sampling all threads for {seconds:g} seconds',
+        **window_sampler.status()
+    }), 202
+
+@bp.route('/profiling/profiles', methods=['GET'])
+@profiling_token_required
+def get_profiles():
+    profiles = list_profiles(current_app.config['PROFILING_DIR'])
+    return jsonify({
+        'items': profiles,
+        'total': len(profiles)
+    })
+
+@bp.route('/profiling/profiles/<name>', methods=['GET'])
+@profiling_token_required
+def download_profile(name):
+    if not name.endswith(COLLAPSED_SUFFIX):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(current_app.config['PROFILING_DIR'], name,
+                               mimetype='text/plain', as_attachment=True)
@@ -1,44 +1,12 @@
 from flask import jsonify, request
-from flask_jwt_extended import jwt_required
-import json
-from app import db
 from app.api import bp
-from app.models import Region
-from app.api.decorators import admin_required
-from app.data_loader import get_animals_for_region, get_all_animals
-
-@bp.route('/regions', methods=['GET'])
-def get_regions():
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    pagination = Region.query.paginate(page=page, per_page=per_page)
-    regions = pagination.items
-    
-    return jsonify({
-        'items': [{
-            'id': region.id,
-            'name': region.name,
-            'description': region.description,
-            'coordinates': json.loads(region.coordinates) if region.coordinates else None,
-            'animal_count': len(region.animals)
-        } for region in regions],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    })
+from app.data_loader import default_dataset_name, get_animals_for_region, get_all_animals, get_region as find_region
 
 @bp.route('/regions/<int:id>', methods=['GET'])
 def get_region(id):
     try:
-        # Get region info from our predefined regions
-        region_info = {
-            1: {"name": "Diana", "description": "Northern region of Madagascar"},
-            2: {"name": "Sava", "description": "Northeastern region of Madagascar"},
-            3: {"name": "Analamanga", "description": "Central region containing the capital Antananarivo"},
-            4: {"name": "Atsinanana", "description": "Eastern coastal region"},
-            5: {"name": "Menabe", "description": "Western coastal region"}
-        }.get(id)
+        # Get region info from the dataset directory
+        region_info = find_region(id)
         
         if not region_info:
             return jsonify({
@@ -62,64 +30,14 @@ def get_region(id):
             'error': 'Failed to load region information'
         }), 500
 
-@bp.route('/regions', methods=['POST'])
-@jwt_required()
-@admin_required
-def create_region():
-    data = request.get_json()
-    
-    region = Region(
-        name=data['name'],
-        description=data.get('description'),
-        coordinates=json.dumps(data.get('coordinates'))
-    )
-    
-    db.session.add(region)
-    db.session.commit()
-    
-    return jsonify({
-        'id': region.id,
-        'name': region.name,
-        'message': 'Region created successfully'
-    }), 201
-
-@bp.route('/regions/<int:id>', methods=['PUT'])
-@jwt_required()
-@admin_required
-def update_region(id):
-    region = Region.query.get_or_404(id)
-    data = request.get_json()
-    
-    region.name = data.get('name', region.name)
-    region.description = data.get('description', region.description)
-    
-    if 'coordinates' in data:
-        region.coordinates = json.dumps(data['coordinates'])
-    
-    db.session.commit()
-    
-    return jsonify({
-        'message': 'Region updated successfully'
-    })
-
-@bp.route('/regions/<int:id>', methods=['DELETE'])
-@jwt_required()
-@admin_required
-def delete_region(id):
-    region = Region.query.get_or_404(id)
-    db.session.delete(region)
-    db.session.commit()
-    
-    return jsonify({
-        'message': 'Region deleted successfully'
-    })
-
 @bp.route('/all-animals', methods=['GET'])
 def get_all_animals_list():
     try:
-        animals = get_all_animals()
+        dataset = request.args.get('dataset') or default_dataset_name()
+        animals = get_all_animals(dataset)
         print(f"Returning {len(animals)} animals")  # Debug print
         return jsonify({
+            'dataset': dataset,
             'items': animals,
             'total': len(animals)
         })
@@ -0,0 +1,77 @@
+from flask import jsonify, request
+from app.api import bp
+from app.data_loader import catalog, get_loaded_animal
+from app.journal import journal, UPSERT, SOURCE_CATALOG, SOURCE_DB
+
+def serialize_db_animal(animal):
+    return {
+        'id': animal.id,
+        'name': animal.name,
+        'scientific_name': animal.scientific_name,
+        'description': animal.description,
+        'risk_level': animal.risk_level,
+        'image_url': animal.image_url,
+        'region_ids': [region.id for region in animal.regions]
+    }
+
+def reset_response(version, since):
+    return jsonify({
+        'version': version,
+        'since': since,
+        'reset': True,
+        'upserts': [],
+        'deletes': []
+    })
+
+@bp.route('/sync', methods=['GET'])
+def sync():
+    """Changes since a version, or ``reset: true`` when the client must refetch.
+
+    Catalog records are only read from datasets already in memory, so a
+    sync never loads an evicted shard; if a changed record cannot be
+    resolved that way (or was deleted from the database since), the client
+    is told to reset rather than silently missing the upsert.
+
+    ``?dataset=`` limits catalog changes to one dataset, so a client
+    browsing one shard is not reset because another one went cold.
+    """
+    since = request.args.get('since', 0, type=int)
+    dataset = request.args.get('dataset')
+    version, reset, changes = journal.changes_since(since)
+
+    if reset:
+        # The journal does not reach back that far; refetch full lists
+        return reset_response(version, since)
+
+    upserts = []
+    deletes = []
+    db_ids = []
+    for (source, record_id), op in changes.items():
+        if dataset and source == SOURCE_CATALOG and catalog.name_for_animal(record_id) != dataset:
+            continue
+        if op != UPSERT:
+            deletes.append({'source': source, 'id': record_id})
+        elif source == SOURCE_DB:
+            db_ids.append(record_id)
+        elif source == SOURCE_CATALOG:
+            animal = get_loaded_animal(record_id)
+            if not animal:
+                return reset_response(version, since)
+            upserts.append({'source': source, 'id': record_id, 'record': animal})
+
+    if db_ids:
+        # Only write-enabled apps journal DB changes, so the models exist here
+        from app.models import Animal
+        animals = Animal.query.filter(Animal.id.in_(db_ids)).all()
+        if len(animals) < len(db_ids):
+            return reset_response(version, since)
+        for animal in animals:
+            upserts.append({'source': SOURCE_DB, 'id': animal.id, 'record': serialize_db_animal(animal)})
+
+    return jsonify({
+        'version': version,
+        'since': since,
+        'reset': False,
+        'upserts': upserts,
+        'deletes': deletes
+    })
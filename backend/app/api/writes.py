@@ -0,0 +1,181 @@
+from flask import current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+import json
+from app import db
+from app.api import write_bp as bp
+from app.models import Animal, Region
+from app.api.decorators import admin_required
+from app.heatmap import sightings, parse_sighting, append_sightings
+from app.journal import journal, SOURCE_DB
+
+@bp.route('/regions', methods=['GET'])
+def get_regions():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    
+    pagination = Region.query.paginate(page=page, per_page=per_page)
+    regions = pagination.items
+    
+    return jsonify({
+        'items': [{
+            'id': region.id,
+            'name': region.name,
+            'description': region.description,
+            'coordinates': json.loads(region.coordinates) if region.coordinates else None,
+            'animal_count': len(region.animals)
+        } for region in regions],
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    })
+
+@bp.route('/animals', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_animal():
+    data = request.get_json()
+    
+    animal = Animal(
+        name=data['name'],
+        scientific_name=data.get('scientific_name'),
+        description=data.get('description'),
+        risk_level=data.get('risk_level'),
+        image_url=data.get('image_url')
+    )
+    
+    if 'region_ids' in data:
+        regions = Region.query.filter(Region.id.in_(data['region_ids'])).all()
+        animal.regions = regions
+    
+    db.session.add(animal)
+    db.session.commit()
+    journal.record(upserts=[animal.id], source=SOURCE_DB)
+    
+    return jsonify({
+        'id': animal.id,
+        'name': animal.name,
+        'message': 'Animal created successfully'
+    }), 201
+
+@bp.route('/animals/<int:id>', methods=['PUT'])
+@jwt_required()
+@admin_required
+def update_animal(id):
+    animal = Animal.query.get_or_404(id)
+    data = request.get_json()
+    
+    animal.name = data.get('name', animal.name)
+    animal.scientific_name = data.get('scientific_name', animal.scientific_name)
+    animal.description = data.get('description', animal.description)
+    animal.risk_level = data.get('risk_level', animal.risk_level)
+    animal.image_url = data.get('image_url', animal.image_url)
+    
+    if 'region_ids' in data:
+        regions = Region.query.filter(Region.id.in_(data['region_ids'])).all()
+        animal.regions = regions
+    
+    db.session.commit()
+    journal.record(upserts=[animal.id], source=SOURCE_DB)
+    
+    return jsonify({
+        'message': 'Animal updated successfully'
+    })
+
+@bp.route('/animals/<int:id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_animal(id):
+    animal = Animal.query.get_or_404(id)
+    db.session.delete(animal)
+    db.session.commit()
+    journal.record(deletes=[id], source=SOURCE_DB)
+    
+    return jsonify({
+        'message': 'Animal deleted successfully'
+    })
+
+@bp.route('/regions', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_region():
+    data = request.get_json()
+    
+    region = Region(
+        name=data['name'],
+        description=data.get('description'),
+        coordinates=json.dumps(data.get('coordinates'))
+    )
+    
+    db.session.add(region)
+    db.session.commit()
+    
+    return jsonify({
+        'id': region.id,
+        'name': region.name,
+        'message': 'Region created successfully'
+    }), 201
+
+@bp.route('/regions/<int:id>', methods=['PUT'])
+@jwt_required()
+@admin_required
+def update_region(id):
+    region = Region.query.get_or_404(id)
+    data = request.get_json()
+    
+    region.name = data.get('name', region.name)
+    region.description = data.get('description', region.description)
+    
+    if 'coordinates' in data:
+        region.coordinates = json.dumps(data['coordinates'])
+    
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Region updated successfully'
+    })
+
+@bp.route('/regions/<int:id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_region(id):
+    region = Region.query.get_or_404(id)
+    db.session.delete(region)
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'Region deleted successfully'
+    })
+
+@bp.route('/sightings', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_sightings():
+    """Record sightings for the heatmap.
+
+    They are appended to SIGHTINGS_FILE when it is a JSONL file; otherwise
+    they only live in this process's memory until restart, which the
+    response reports as ``persisted: false``.
+    """
+    data = request.get_json()
+    records = data.get('sightings', [data]) if isinstance(data, dict) else data
+
+    if not isinstance(records, list):
+        return jsonify({'error': 'Expected a sighting or a list of sightings'}), 400
+
+    try:
+        parsed = [parse_sighting(record) for record in records]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    added = 0
+    persisted = append_sightings(current_app.config.get('SIGHTINGS_FILE'), parsed)
+    if parsed:
+        lat, lon, animal_ids = zip(*parsed)
+        added = sightings.add(lat, lon, animal_ids)
+
+    return jsonify({
+        'added': added,
+        'total': len(sightings),
+        'persisted': persisted,
+        'message': 'Sightings recorded successfully'
+    }), 201
@@ -0,0 +1,282 @@
+import bisect
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Each dataset owns a block of animal ids: [id_offset + 1, id_offset + ID_BLOCK]
+ID_BLOCK = 1_000_000
+
+
+class Dataset:
+    """One shard of the catalog: a species source file plus its regions.
+
+    The spec (paths, id range, region definitions) is always in memory so
+    requests can be routed without loading anything; the animal records are
+    only present while the dataset is loaded.
+    """
+
+    def __init__(self, name: str, source: str, photos_dir: str, regions: Dict[int, dict],
+                 id_offset: int = 0, images_subdir: str = ''):
+        self.name = name
+        self.source = source
+        self.photos_dir = photos_dir
+        self.regions = regions
+        self.id_offset = id_offset
+        self.images_subdir = images_subdir
+        self.loaded = False
+        self.size = 0
+        self.animals: List[dict] = []
+        self.animals_by_id: Dict[int, dict] = {}
+        self.animals_by_region: Dict[int, List[dict]] = {region_id: [] for region_id in regions}
+        # Lower-cased risk level -> animal ids, for filtering without a scan
+        self.animal_ids_by_risk: Dict[str, List[int]] = {}
+        # Derived structures (e.g. the related-species index) that survive
+        # a reload so they can be updated incrementally, but not an eviction
+        self.indexes: Dict[str, object] = {}
+        # (upserts, deletes) found by the load that filled this staging copy,
+        # or None when there was nothing in memory to diff against
+        self.changes: Optional[Tuple[List[int], List[int]]] = None
+
+    def reset(self, evict: bool = False):
+        """Drop loaded records, keeping the spec."""
+        if evict:
+            self.indexes = {}
+        self.loaded = False
+        self.size = 0
+        self.animals = []
+        self.animals_by_id = {}
+        self.animals_by_region = {region_id: [] for region_id in self.regions}
+        self.animal_ids_by_risk = {}
+
+    def staging(self) -> 'Dataset':
+        """An empty copy of the spec to load into, carrying over the indexes."""
+        staging = Dataset(self.name, self.source, self.photos_dir, self.regions,
+                          id_offset=self.id_offset, images_subdir=self.images_subdir)
+        staging.indexes = dict(self.indexes)
+        return staging
+
+    def adopt(self, staging: 'Dataset'):
+        """Take over the records loaded into ``staging``."""
+        self.size = staging.size
+        self.animals = staging.animals
+        self.animals_by_id = staging.animals_by_id
+        self.animals_by_region = staging.animals_by_region
+        self.animal_ids_by_risk = staging.animal_ids_by_risk
+        self.indexes = staging.indexes
+
+    def add_animal(self, animal: dict, region_ids):
+        self.animals.append(animal)
+        self.animals_by_id[animal['id']] = animal
+        for region_id in region_ids:
+            self.animals_by_region[region_id].append(animal)
+        self.animal_ids_by_risk.setdefault((animal.get('risk_level') or '').lower(), []).append(animal['id'])
+        self.size += estimate_size(animal)
+
+    def memory_size(self) -> int:
+        """Estimated bytes held by the records plus derived indexes."""
+        return self.size + sum(getattr(index, 'nbytes', 0) for index in self.indexes.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'loaded': self.loaded,
+            'animal_count': len(self.animals) if self.loaded else None,
+            'id_range': [self.id_offset + 1, self.id_offset + ID_BLOCK],
+            'regions': [{
+                'id': region_id,
+                'name': region['name'],
+                'description': region.get('description')
+            } for region_id, region in self.regions.items()]
+        }
+
+
+def estimate_size(animal: dict) -> int:
+    """Rough in-memory footprint of one animal record, in bytes."""
+    return sys.getsizeof(animal) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value) for key, value in animal.items()
+    )
+
+
+class Catalog:
+    """Registry of datasets with lazy loading and LRU eviction.
+
+    Datasets are loaded by ``loader`` the first time a request touches
+    them. When the estimated size of all loaded datasets exceeds
+    ``memory_budget`` bytes (0 means unlimited), the least recently used
+    ones are unloaded.
+
+    Callers access records through ``use``, which pins the dataset so it
+    cannot be evicted mid-request. Loads run into a staging copy under a
+    per-dataset lock, so a slow load neither blocks requests for other
+    datasets nor exposes half-loaded records; the result is swapped in
+    under the catalog lock, after which ``on_swap`` is called with the
+    staging copy (e.g. to journal what the load changed).
+    """
+
+    def __init__(self, loader: Callable[[Dataset], bool], memory_budget: int = 0,
+                 on_swap: Optional[Callable[[Dataset], None]] = None):
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self.on_swap = on_swap
+        self._lock = threading.RLock()
+        self._datasets: Dict[str, Dataset] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._pins: Dict[str, int] = {}
+        self._region_directory: Dict[int, str] = {}
+        self._id_directory: List[tuple] = []  # sorted (id_offset, name)
+        self._lru: 'OrderedDict[str, Dataset]' = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._datasets.clear()
+            self._load_locks.clear()
+            self._pins.clear()
+            self._region_directory.clear()
+            self._id_directory.clear()
+            self._lru.clear()
+
+    def register(self, dataset: Dataset):
+        """Add a dataset to the directory without loading it."""
+        with self._lock:
+            if dataset.name in self._datasets:
+                raise ValueError(f"Dataset {dataset.name!r} is already registered")
+            for region_id in dataset.regions:
+                if region_id in self._region_directory:
+                    raise ValueError(
+                        f"Region {region_id} of {dataset.name!r} is already "
+                        f"registered by {self._region_directory[region_id]!r}"
+                    )
+            for offset, name in self._id_directory:
+                if abs(offset - dataset.id_offset) < ID_BLOCK:
+                    raise ValueError(
+                        f"Id range of {dataset.name!r} (offset {dataset.id_offset}) overlaps "
+                        f"the one of {name!r} (offset {offset})"
+                    )
+
+            self._datasets[dataset.name] = dataset
+            self._load_locks[dataset.name] = threading.Lock()
+            for region_id in dataset.regions:
+                self._region_directory[region_id] = dataset.name
+            bisect.insort(self._id_directory, (dataset.id_offset, dataset.name))
+
+    def names(self) -> List[str]:
+        return list(self._datasets)
+
+    def datasets(self) -> List[Dataset]:
+        return list(self._datasets.values())
+
+    def name_for_region(self, region_id: int) -> Optional[str]:
+        return self._region_directory.get(region_id)
+
+    def name_for_animal(self, animal_id: int) -> Optional[str]:
+        index = bisect.bisect_left(self._id_directory, (animal_id, '')) - 1
+        if index < 0:
+            return None
+        offset, name = self._id_directory[index]
+        return name if animal_id <= offset + ID_BLOCK else None
+
+    @contextmanager
+    def use(self, name: Optional[str]) -> Iterator[Optional[Dataset]]:
+        """Load a dataset if needed and keep it pinned for the ``with`` block.
+
+        Yields None for unknown names and datasets that failed to load.
+        """
+        dataset = self._datasets.get(name) if name else None
+        dataset = self._ensure_loaded(dataset) if dataset else None
+        try:
+            yield dataset
+        finally:
+            if dataset:
+                self._release(dataset)
+
+    def peek(self, name: Optional[str]) -> Optional[Dataset]:
+        """Get a dataset only if it is already loaded; never loads."""
+        dataset = self._datasets.get(name) if name else None
+        return dataset if dataset and dataset.loaded else None
+
+    def region_info(self, region_id: int) -> Optional[dict]:
+        """Get a region definition without loading its dataset."""
+        name = self._region_directory.get(region_id)
+        return self._datasets[name].regions[region_id] if name else None
+
+    def reload(self, name: str) -> bool:
+        """Force a (re)load of a dataset, e.g. after its source file changed.
+
+        The previous records keep being served until the new ones are in.
+        """
+        dataset = self._datasets[name]
+        with self._load_locks[name]:
+            if not self._load(dataset):
+                return False
+        self._release(dataset)
+        return True
+
+    def loaded_size(self) -> int:
+        with self._lock:
+            return sum(dataset.memory_size() for dataset in self._lru.values())
+
+    def _ensure_loaded(self, dataset: Dataset) -> Optional[Dataset]:
+        """Return the dataset loaded and pinned, or None if loading failed."""
+        with self._lock:
+            if dataset.loaded:
+                return self._pin(dataset)
+
+        with self._load_locks[dataset.name]:
+            # Another request may have loaded it while we waited
+            with self._lock:
+                if dataset.loaded:
+                    return self._pin(dataset)
+            return dataset if self._load(dataset) else None
+
+    def _load(self, dataset: Dataset) -> bool:
+        """Run the loader into a staging copy and swap it in, pinned.
+
+        Called with the dataset's load lock held, but not the catalog lock.
+        """
+        staging = dataset.staging()
+        if not self.loader(staging):
+            return False
+        with self._lock:
+            dataset.adopt(staging)
+            dataset.loaded = True
+            if self.on_swap:
+                self.on_swap(staging)
+            self._pin(dataset)
+            self._evict()
+        return True
+
+    def _pin(self, dataset: Dataset) -> Dataset:
+        self._pins[dataset.name] = self._pins.get(dataset.name, 0) + 1
+        self._lru[dataset.name] = dataset
+        self._lru.move_to_end(dataset.name)
+        return dataset
+
+    def _release(self, dataset: Dataset):
+        with self._lock:
+            self._pins[dataset.name] -= 1
+            if not self._pins[dataset.name]:
+                del self._pins[dataset.name]
+            # Evictions skipped while it was pinned happen now
+            self._evict()
+
+    def _evict(self):
+        """Unload least recently used datasets that are not in use.
+
+        The most recently used dataset is always kept, even if it alone
+        exceeds the budget.
+        """
+        if not self.memory_budget:
+            return
+        for name in list(self._lru)[:-1]:
+            if self.loaded_size() <= self.memory_budget:
+                break
+            if name in self._pins:
+                continue
+            print(f"Evicting dataset {name} from catalog")
+            self._unload(self._lru[name], evict=True)
+
+    def _unload(self, dataset: Dataset, evict: bool = False):
+        self._lru.pop(dataset.name, None)
+        dataset.reset(evict=evict)
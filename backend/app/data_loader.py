@@ -1,142 +1,307 @@
+import copy
 import json
 import os
-import random
-from typing import Dict, List
-from pathlib import Path
-
-# Dictionary to store animals by region
-animals_by_region: Dict[int, List[dict]] = {
-    1: [],  # Diana (Northern)
-    2: [],  # Sava (Northeastern)
-    3: [],  # Analamanga (Central)
-    4: [],  # Atsinanana (Eastern)
-    5: []   # Menabe (Western)
+from typing import Dict, List, Optional, Set, Tuple
+from app.catalog import Catalog, Dataset, ID_BLOCK
+from app.ingest import IngestReport, stream_animals
+from app.journal import RecordFingerprints, journal
+from app.profiling import span, timed
+from app.photos import PhotoManifest, normalize_name, photos_by_name, publish_photo
+from app.similarity import RelatedIndex
+
+# Define paths relative to the workspace root
+WORKSPACE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+STATIC_IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'static', 'animal-images')
+
+DEFAULT_DATASET = 'madagascar'
+
+# Regions of the built-in Madagascar dataset, with the keywords used to
+# place animals from their free-text region description
+MADAGASCAR_REGIONS: Dict[int, dict] = {
+    1: {"name": "Diana", "description": "Northern region of Madagascar",
+        "keywords": ['northern', 'north']},
+    2: {"name": "Sava", "description": "Northeastern region of Madagascar",
+        "keywords": ['northeastern', 'ne ']},
+    3: {"name": "Analamanga", "description": "Central region containing the capital Antananarivo",
+        "keywords": ['central']},
+    4: {"name": "Atsinanana", "description": "Eastern coastal region",
+        "keywords": ['eastern']},
+    5: {"name": "Menabe", "description": "Western coastal region",
+        "keywords": ['western']}
 }
 
-# Global list to store all animals
-all_animals: List[dict] = []
+# Options applied when datasets are loaded
+loader_options = {'workers': 0, 'batch_size': 1000}
+related_options = {'k': 10}
+
+# Reports from the most recent ingest run of each dataset
+ingest_reports: Dict[str, IngestReport] = {}
+
+# Digest of the records each dataset had when it was last swapped in. The
+# per-record fingerprints live in the dataset's indexes and are evicted
+# with it; the digest survives so a reload after an eviction can still
+# tell whether anything changed.
+fingerprint_digests: Dict[str, str] = {}
+
+def diff_dataset(dataset: Dataset) -> Tuple[List[int], List[int]]:
+    """Fingerprint a freshly loaded staging dataset and diff it against the
+    records it will replace.
+
+    The changes are only staged on the dataset; journal_swapped_dataset
+    records them once the catalog has swapped the dataset in.
+    """
+    fingerprints = RecordFingerprints(dataset.animals)
+    previous = dataset.indexes.get('fingerprints')
+    dataset.indexes['fingerprints'] = fingerprints
+    dataset.changes = fingerprints.changes_since(previous) \
+        if isinstance(previous, RecordFingerprints) else None
+    return dataset.changes or ([], [])
+
+def journal_swapped_dataset(dataset: Dataset):
+    """Journal what a load changed, once its records are being served.
+
+    A shard's first load in this process is not journaled: no client can
+    hold its records from this process yet. After an eviction the diff
+    is unknown, so clients are only reset if the records actually changed.
+    """
+    digest = dataset.indexes['fingerprints'].digest
+    previous_digest = fingerprint_digests.get(dataset.name)
+    fingerprint_digests[dataset.name] = digest
+    if dataset.changes is not None:
+        upserts, deletes = dataset.changes
+        journal.record(upserts=upserts, deletes=deletes)
+    elif previous_digest is not None and previous_digest != digest:
+        journal.invalidate()
+
+def index_related_species(dataset: Dataset, upserts: List[int], deletes: List[int]):
+    """Build the related-species index, or update the one kept from the previous load."""
+    region_ids: Dict[int, Set[int]] = {}
+    for region_id, animals in dataset.animals_by_region.items():
+        for animal in animals:
+            region_ids.setdefault(animal['id'], set()).add(region_id)
+
+    index = dataset.indexes.get('related')
+    if isinstance(index, RelatedIndex) and index.k == related_options['k']:
+        # The live dataset still serves the old index until the reload is swapped in
+        index = copy.copy(index)
+        index.update(dataset.animals, region_ids, changed=upserts, deleted=deletes)
+    else:
+        index = RelatedIndex(k=related_options['k'])
+        index.build(dataset.animals, region_ids)
+    dataset.indexes['related'] = index
+
+def regions_for_description(region_text: str, regions: Dict[int, dict]) -> Set[int]:
+    """Map a free-text region description to region IDs."""
+    region = region_text.lower()
+    matched = {
+        region_id for region_id, info in regions.items()
+        if any(keyword in region for keyword in info.get('keywords', []))
+    }
 
-def load_animals_from_csv() -> bool:
-    """Load animals from JSON file and distribute them to regions."""
+    # If no specific region found or "throughout ...", add to all regions
+    if not matched or 'throughout' in region:
+        matched = set(regions)
+    return matched
+
+@timed('load_dataset')
+def load_dataset(dataset: Dataset) -> bool:
+    """Stream a dataset's source file into it and distribute animals to regions.
+
+    The source file is read record by record, so it never has to fit in
+    memory. Records failing schema validation are collected in an
+    IngestReport (see get_ingest_report) instead of aborting the load.
+    """
     try:
-        # Clear existing data
-        all_animals.clear()
-        for region_id in animals_by_region:
-            animals_by_region[region_id].clear()
-            
-        # Define paths relative to the workspace root
-        workspace_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-        json_path = os.path.join(workspace_root, 'Animals_Madagascar.json')
-        photos_dir = os.path.join(workspace_root, 'Animals_Photo')
-        
-        print(f"Loading animals from: {json_path}")
-        print(f"Photos directory: {photos_dir}")
-        
-        if not os.path.exists(json_path):
-            print(f"Error: JSON file not found at {json_path}")
+        print(f"Loading dataset {dataset.name} from: {dataset.source}")
+        print(f"Photos directory: {dataset.photos_dir}")
+
+        if not os.path.exists(dataset.source):
+            print(f"Error: JSON file not found at {dataset.source}")
             return False
-            
-        if not os.path.exists(photos_dir):
-            print(f"Error: Photos directory not found at {photos_dir}")
+
+        if not os.path.exists(dataset.photos_dir):
+            print(f"Error: Photos directory not found at {dataset.photos_dir}")
             return False
 
-        # Get list of available photos
-        available_photos = {
-            file.stem.lower(): file.name 
-            for file in Path(photos_dir).glob('*.jpg')
-        }
-        
+        report = IngestReport(source=dataset.source)
+
+        # Get available photos from the manifest; only new or modified
+        # files are hashed and validated
+        available_photos = photos_by_name(photo_manifest.scan(dataset.photos_dir), report)
+
         print(f"Found {len(available_photos)} photos")
-        
-        # Load and parse JSON file
-        with open(json_path, 'r', encoding='utf-8') as f:
-            animals_data = json.load(f)
-            
-        print(f"Loaded {len(animals_data)} animals from JSON")
-        
-        # Process each animal
-        for i, animal in enumerate(animals_data):
-            try:
-                # Find matching photo
-                photo_name = animal['Common Name'].lower()
-                image_filename = available_photos.get(photo_name)
-                
-                if not image_filename:
-                    print(f"Warning: No photo found for {animal['Common Name']}")
-                    continue
-                    
-                # Copy photo to static directory
-                source_path = os.path.join(photos_dir, image_filename)
-                dest_dir = os.path.join('app', 'static', 'animal-images')
-                os.makedirs(dest_dir, exist_ok=True)
-                dest_path = os.path.join(dest_dir, image_filename)
-                
-                # Copy only if not already exists
-                if not os.path.exists(dest_path):
-                    import shutil
-                    shutil.copy2(source_path, dest_path)
-                
-                image_url = f"/static/animal-images/{image_filename}"
-                    
-                animal_data = {
-                    'id': i + 1,
-                    'name': animal['Common Name'],
-                    'scientific_name': animal['Scientific Name'],
-                    'risk_level': animal['Risk Level'].split('(')[0].strip(),
-                    'description': animal['Description'],
-                    'type': animal['Type'],
-                    'region': animal['Region'],
-                    'habitat': animal['Habitat'],
-                    'image_url': image_url
-                }
-                
-                # Add to global list
-                all_animals.append(animal_data)
-                
-                # Distribute to regions based on region description
-                region = animal['Region'].lower()
-                regions = set()  # Use set to avoid duplicates
-                
-                # Map region descriptions to regions
-                if any(x in region for x in ['northern', 'north']):
-                    regions.add(1)  # Diana
-                if any(x in region for x in ['northeastern', 'ne ']):
-                    regions.add(2)  # Sava
-                if 'central' in region:
-                    regions.add(3)  # Analamanga
-                if 'eastern' in region:
-                    regions.add(4)  # Atsinanana
-                if 'western' in region:
-                    regions.add(5)  # Menabe
-                
-                # If no specific region found or "throughout Madagascar", add to all regions
-                if not regions or 'throughout' in region:
-                    regions = {1, 2, 3, 4, 5}
-                
-                # Add the animal to its regions
-                for region_id in regions:
-                    animals_by_region[region_id].append(animal_data)
-                    
-            except KeyError as e:
-                print(f"Warning: Skipping animal due to missing field: {e}")
+
+        dest_dir = os.path.join(STATIC_IMAGES_DIR, dataset.images_subdir)
+        os.makedirs(dest_dir, exist_ok=True)
+        url_prefix = '/static/animal-images/' + \
+            (f"{dataset.images_subdir}/" if dataset.images_subdir else '')
+        published = set(os.listdir(dest_dir))
+
+        for animal_data in stream_animals(dataset.source, report, **loader_options):
+            if animal_data['id'] > ID_BLOCK:
+                report.add_invalid(animal_data['id'] - 1, [f"beyond the {ID_BLOCK} records allowed per dataset"])
+                continue
+            animal_data['id'] += dataset.id_offset
+
+            # Find matching photo
+            photo = available_photos.get(normalize_name(animal_data['name']))
+
+            if not photo:
+                report.add_missing_photo(animal_data['name'])
                 continue
-        
-        print(f"Successfully processed {len(all_animals)} animals")
-        for region_id, animals in animals_by_region.items():
+
+            # Copy photo to static directory under its content hash
+            image_filename = publish_photo(photo, dataset.photos_dir, dest_dir, published)
+            animal_data['image_url'] = url_prefix + image_filename
+
+            dataset.add_animal(animal_data, regions_for_description(animal_data['region'], dataset.regions))
+            report.loaded += 1
+
+        ingest_reports[dataset.name] = report
+        upserts, deletes = diff_dataset(dataset)
+        with span('related_index'):
+            index_related_species(dataset, upserts, deletes)
+        print(report.summary())
+        for region_id, animals in dataset.animals_by_region.items():
             print(f"Region {region_id}: {len(animals)} animals")
-            
+
         return True
-            
+
     except Exception as e:
         print(f"Unexpected error loading JSON file: {e}")
         import traceback
         traceback.print_exc()
         return False
 
-def get_all_animals() -> List[dict]:
-    """Get all animals."""
-    return all_animals
+# Global catalog of datasets
+catalog = Catalog(loader=load_dataset, on_swap=journal_swapped_dataset)
+
+# Global photo manifest shared by all datasets
+photo_manifest = PhotoManifest()
+
+def default_datasets() -> List[Dataset]:
+    """The built-in Madagascar dataset shipped with the repository."""
+    return [Dataset(
+        name=DEFAULT_DATASET,
+        source=os.path.join(WORKSPACE_ROOT, 'Animals_Madagascar.json'),
+        photos_dir=os.path.join(WORKSPACE_ROOT, 'Animals_Photo'),
+        regions=MADAGASCAR_REGIONS
+    )]
+
+def datasets_from_file(path: str) -> List[Dataset]:
+    """Read dataset specs from a catalog JSON file.
+
+    The file holds a list of objects with ``name``, ``source``,
+    ``photos_dir``, optional ``id_offset`` and ``images_subdir``, and
+    ``regions`` (a list of ``{"id", "name", "description", "keywords"}``).
+    Relative paths are resolved against the catalog file's directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        specs = json.load(f)
+
+    datasets = []
+    for position, spec in enumerate(specs):
+        datasets.append(Dataset(
+            name=spec['name'],
+            source=os.path.join(base_dir, spec['source']),
+            photos_dir=os.path.join(base_dir, spec['photos_dir']),
+            regions={
+                int(region['id']): {
+                    'name': region['name'],
+                    'description': region.get('description'),
+                    'keywords': [keyword.lower() for keyword in region.get('keywords', [])]
+                } for region in spec.get('regions', [])
+            },
+            id_offset=int(spec.get('id_offset', position * ID_BLOCK)),
+            images_subdir=spec.get('images_subdir', '' if position == 0 else spec['name'])
+        ))
+    return datasets
+
+def configure_catalog(catalog_file: Optional[str] = None, memory_budget: int = 0,
+                      workers: int = 0, batch_size: int = 1000, related_k: int = 10,
+                      photo_manifest_path: Optional[str] = None, photo_workers: int = 4):
+    """Register datasets with the catalog; nothing is loaded yet."""
+    loader_options.update(workers=workers, batch_size=batch_size)
+    related_options.update(k=related_k)
+    photo_manifest.path = photo_manifest_path
+    photo_manifest.workers = photo_workers
+    photo_manifest.load()
+    catalog.clear()
+    catalog.memory_budget = memory_budget
+    ingest_reports.clear()
+    fingerprint_digests.clear()
+
+    datasets = datasets_from_file(catalog_file) if catalog_file else default_datasets()
+    for dataset in datasets:
+        catalog.register(dataset)
+
+@timed('load_animals_from_csv')
+def load_animals_from_csv(workers: Optional[int] = None, batch_size: Optional[int] = None) -> bool:
+    """(Re)load the first registered dataset, registering the defaults if needed."""
+    if workers is not None:
+        loader_options['workers'] = workers
+    if batch_size is not None:
+        loader_options['batch_size'] = batch_size
+    if not catalog.names():
+        for dataset in default_datasets():
+            catalog.register(dataset)
+    return catalog.reload(catalog.names()[0])
+
+def default_dataset_name() -> Optional[str]:
+    """The first registered dataset, served when a request names none."""
+    names = catalog.names()
+    return names[0] if names else None
+
+def get_all_animals(dataset: Optional[str] = None) -> List[dict]:
+    """Get all animals of one dataset, the default one when none is given.
+
+    Only that shard is loaded; other datasets are listed separately with
+    ``?dataset=`` so a listing never pulls every cold shard into memory.
+    """
+    with catalog.use(dataset or default_dataset_name()) as loaded:
+        return loaded.animals if loaded else []
+
+def get_animal_ids_by_risk(risk_level: str, dataset: Optional[str] = None) -> List[int]:
+    """Get the ids of a dataset's animals with the given risk level."""
+    with catalog.use(dataset or default_dataset_name()) as loaded:
+        return loaded.animal_ids_by_risk.get(risk_level.lower(), []) if loaded else []
+
+def get_animal(animal_id: int) -> Optional[dict]:
+    """Get one animal, loading only the dataset that owns its id."""
+    with catalog.use(catalog.name_for_animal(animal_id)) as dataset:
+        return dataset.animals_by_id.get(animal_id) if dataset else None
+
+def get_loaded_animal(animal_id: int) -> Optional[dict]:
+    """Get one animal if its dataset is already in memory, without loading it."""
+    dataset = catalog.peek(catalog.name_for_animal(animal_id))
+    return dataset.animals_by_id.get(animal_id) if dataset else None
+
+def get_related_animals(animal_id: int, k: int) -> Optional[List[dict]]:
+    """Get the k most similar animals from the precomputed index."""
+    with catalog.use(catalog.name_for_animal(animal_id)) as dataset:
+        if not dataset or animal_id not in dataset.animals_by_id:
+            return None
+
+        index = dataset.indexes.get('related')
+        if not isinstance(index, RelatedIndex):
+            return []
+        related = []
+        for related_id, score in index.related(animal_id, k) or []:
+            animal = dataset.animals_by_id.get(related_id)
+            if animal:
+                related.append({**animal, 'score': round(score, 4)})
+        return related
+
+def get_region(region_id: int) -> Optional[dict]:
+    """Get a region definition without loading its dataset."""
+    return catalog.region_info(region_id)
 
 def get_animals_for_region(region_id: int) -> List[dict]:
     """Get animals for a specific region."""
-    return animals_by_region.get(region_id, []) 
\ No newline at end of file
+    with catalog.use(catalog.name_for_region(region_id)) as dataset:
+        return dataset.animals_by_region.get(region_id, []) if dataset else []
+
+def get_ingest_report(dataset: str = DEFAULT_DATASET) -> Optional[IngestReport]:
+    """Get the report from the most recent ingest run of a dataset."""
+    return ingest_reports.get(dataset)
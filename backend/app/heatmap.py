@@ -0,0 +1,358 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.ingest import IngestReport, JSONL_EXTENSIONS, iter_source_records
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+MAX_PRECISION = 8
+
+
+def precision_for_zoom(zoom: int) -> int:
+    """Pick the finest geohash precision with at most 8x8 cells per 256px map tile."""
+    return max(1, min(MAX_PRECISION, (2 * (zoom + 3)) // 5))
+
+
+def _bits(precision: int) -> Tuple[int, int]:
+    """Number of (lat, lon) bits in a geohash of the given precision."""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def _lat_bins(lat, lat_bits: int) -> np.ndarray:
+    bins = np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64)
+    return np.clip(bins, 0, (1 << lat_bits) - 1)
+
+
+def _lon_bins(lon, lon_bits: int) -> np.ndarray:
+    bins = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64)
+    return np.clip(bins, 0, (1 << lon_bits) - 1)
+
+
+def bin_points(lat: np.ndarray, lon: np.ndarray, precision: int) -> np.ndarray:
+    """Vectorized geohash binning; returns one int64 cell key per point.
+
+    Keys sort by latitude row first, so a latitude band of cells is one
+    contiguous range of keys.
+    """
+    lat_bits, lon_bits = _bits(precision)
+    return (_lat_bins(lat, lat_bits) << lon_bits) | _lon_bins(lon, lon_bits)
+
+
+def cell_bounds(keys: np.ndarray, precision: int) -> np.ndarray:
+    """Return an (n, 4) array of [south, west, north, east] for cell keys."""
+    lat_bits, lon_bits = _bits(precision)
+    lat_bin = keys >> lon_bits
+    lon_bin = keys & ((1 << lon_bits) - 1)
+    lat_step = 180.0 / (1 << lat_bits)
+    lon_step = 360.0 / (1 << lon_bits)
+    south = lat_bin * lat_step - 90.0
+    west = lon_bin * lon_step - 180.0
+    return np.stack([south, west, south + lat_step, west + lon_step], axis=1)
+
+
+def cell_geohash(key: int, precision: int) -> str:
+    """Encode a cell key as its geohash string."""
+    lat_bits, lon_bits = _bits(precision)
+    lat_bin = key >> lon_bits
+    lon_bin = key & ((1 << lon_bits) - 1)
+    # Geohash interleaves bits starting with longitude
+    value = 0
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            lon_bits -= 1
+            value = (value << 1) | ((lon_bin >> lon_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((lat_bin >> lat_bits) & 1)
+    return ''.join(
+        GEOHASH_ALPHABET[(value >> shift) & 31]
+        for shift in range(5 * (precision - 1), -1, -5)
+    )
+
+
+# Grid rows are keyed by (cell key << ANIMAL_BITS) | animal code; cell keys
+# use at most 5 * MAX_PRECISION = 40 bits, so the composite fits in int64
+ANIMAL_BITS = 23
+ANIMAL_MASK = (1 << ANIMAL_BITS) - 1
+
+
+class _Grid:
+    """Sorted unique (cell, animal) keys with counts for one precision.
+
+    New observations are appended to ``pending`` in O(new points) and only
+    merged into the sorted arrays when the grid is next read. Per-cell
+    totals are cached until the next merge.
+    """
+
+    def __init__(self, keys: np.ndarray, counts: np.ndarray):
+        self.keys = keys
+        self.counts = counts
+        self.pending: List[np.ndarray] = []
+        self.cells: Optional[np.ndarray] = None
+        self.cell_counts: Optional[np.ndarray] = None
+
+    def merge_pending(self):
+        if not self.pending:
+            return
+        keys, counts = np.unique(np.concatenate(self.pending), return_counts=True)
+        self.pending = []
+
+        # Sorted-key merge: bump existing rows, insert the new ones
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        merged = self.counts.copy()
+        merged[pos[found]] += counts[found]
+        if not found.all():
+            self.keys = np.insert(self.keys, pos[~found], keys[~found])
+            merged = np.insert(merged, pos[~found], counts[~found])
+        self.counts = merged
+        self.cells = self.cell_counts = None
+
+    def cell_totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.cells is None:
+            cells = self.keys >> ANIMAL_BITS
+            if len(cells):
+                starts = np.flatnonzero(np.concatenate([[True], cells[1:] != cells[:-1]]))
+                self.cells, self.cell_counts = cells[starts], np.add.reduceat(self.counts, starts)
+            else:
+                self.cells, self.cell_counts = cells, self.counts
+        return self.cells, self.cell_counts
+
+
+class SightingIndex:
+    """Point store for animal sightings with per-zoom binned grids.
+
+    Points live in NumPy buffers that grow by doubling, so adding points is
+    amortized O(new points). The (cell, animal) count grid for a zoom level
+    is binned on first request and cached; later observations are queued
+    as deltas on every cached grid and merged into it on the next read.
+    Queries cut the grid down to the bbox's latitude band with a binary
+    search before touching any cell.
+
+    Sightings are held in this process's memory; see ``append_sightings``
+    for persisting them.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._lat = np.empty(capacity, dtype=np.float64)
+        self._lon = np.empty(capacity, dtype=np.float64)
+        self._animal = np.empty(capacity, dtype=np.int64)
+        # Animal ids are mapped to dense codes so they fit in ANIMAL_BITS
+        self._codes: Dict[int, int] = {}
+        # precision -> grid
+        self._grids: Dict[int, _Grid] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._codes.clear()
+            self._grids.clear()
+
+    def _encode(self, animal_ids: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(animal_ids, return_inverse=True)
+        codes = np.array([self._codes.setdefault(int(animal_id), len(self._codes))
+                          for animal_id in unique], dtype=np.int64)
+        if len(self._codes) > ANIMAL_MASK + 1:
+            raise ValueError('too many distinct animals in the sighting index')
+        return codes[inverse.ravel()]
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._lat):
+            return
+        capacity = max(needed, 2 * len(self._lat))
+        for name in ('_lat', '_lon', '_animal'):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def add(self, lat: Iterable[float], lon: Iterable[float], animal_ids: Iterable[int]) -> int:
+        """Add observations and queue them on the cached grids."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        animal_ids = np.asarray(animal_ids, dtype=np.int64)
+        if not (len(lat) == len(lon) == len(animal_ids)):
+            raise ValueError('lat, lon and animal_ids must have the same length')
+
+        valid = (np.abs(lat) <= 90.0) & (np.abs(lon) <= 180.0)
+        lat, lon, animal_ids = lat[valid], lon[valid], animal_ids[valid]
+        if len(lat) == 0:
+            return 0
+
+        with self._lock:
+            codes = self._encode(animal_ids)
+            self._reserve(len(lat))
+            end = self._size + len(lat)
+            self._lat[self._size:end] = lat
+            self._lon[self._size:end] = lon
+            self._animal[self._size:end] = codes
+            self._size = end
+            for precision, grid in self._grids.items():
+                grid.pending.append((bin_points(lat, lon, precision) << ANIMAL_BITS) | codes)
+        return len(lat)
+
+    def _grid(self, precision: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Snapshot of (keys, counts, cells, cell counts) for a precision."""
+        with self._lock:
+            grid = self._grids.get(precision)
+            size, lat, lon, animal = self._size, self._lat, self._lon, self._animal
+
+        if grid is None:
+            # Bin the existing points without holding the lock; the buffers
+            # only ever grow, so the first ``size`` entries are stable
+            keys, counts = np.unique(
+                (bin_points(lat[:size], lon[:size], precision) << ANIMAL_BITS) | animal[:size],
+                return_counts=True
+            )
+            with self._lock:
+                grid = self._grids.get(precision)
+                if grid is None:
+                    grid = self._grids[precision] = _Grid(keys, counts.astype(np.int64))
+                    if self._size > size:
+                        # Points added while binning
+                        grid.pending.append(
+                            (bin_points(self._lat[size:self._size], self._lon[size:self._size], precision)
+                             << ANIMAL_BITS) | self._animal[size:self._size]
+                        )
+
+        with self._lock:
+            grid.merge_pending()
+            cells, cell_counts = grid.cell_totals()
+            return grid.keys, grid.counts, cells, cell_counts
+
+    def heatmap(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None,
+                animal_ids: Optional[List[int]] = None, max_cells: Optional[int] = None) -> dict:
+        """Return density cells for a zoom level.
+
+        ``bbox`` is (west, south, east, north) as produced by Leaflet's
+        ``LatLngBounds.toBBoxString``; ``animal_ids`` restricts the counts to
+        the given animals. When more than ``max_cells`` cells match, only the
+        densest are returned and ``truncated`` is set.
+        """
+        precision = precision_for_zoom(zoom)
+        lat_bits, lon_bits = _bits(precision)
+        keys, counts, cells, cell_counts = self._grid(precision)
+
+        # Latitude band of the bbox as a contiguous key range
+        lo_cell, hi_cell = 0, 1 << (lat_bits + lon_bits)
+        if bbox is not None:
+            west, south, east, north = bbox
+            lo_cell = int(_lat_bins(south, lat_bits)) << lon_bits
+            hi_cell = (int(_lat_bins(north, lat_bits)) + 1) << lon_bits
+
+        if animal_ids is None:
+            start, stop = np.searchsorted(cells, [lo_cell, hi_cell])
+            cells, cell_counts = cells[start:stop], cell_counts[start:stop]
+        else:
+            start, stop = np.searchsorted(keys, [lo_cell << ANIMAL_BITS, hi_cell << ANIMAL_BITS])
+            keys, counts = keys[start:stop], counts[start:stop]
+            codes = [self._codes[animal_id] for animal_id in animal_ids if animal_id in self._codes]
+            mask = np.isin(keys & ANIMAL_MASK, codes)
+            cells, inverse = np.unique(keys[mask] >> ANIMAL_BITS, return_inverse=True)
+            cell_counts = np.bincount(inverse.ravel(), weights=counts[mask], minlength=len(cells)).astype(np.int64)
+
+        if bbox is not None:
+            lon_bin = cells & ((1 << lon_bits) - 1)
+            lo_lon, hi_lon = int(_lon_bins(west, lon_bits)), int(_lon_bins(east, lon_bits))
+            if lo_lon <= hi_lon:
+                mask = (lon_bin >= lo_lon) & (lon_bin <= hi_lon)
+            else:
+                # bbox crosses the antimeridian
+                mask = (lon_bin >= lo_lon) | (lon_bin <= hi_lon)
+            cells, cell_counts = cells[mask], cell_counts[mask]
+
+        total = int(cell_counts.sum())
+        truncated = max_cells is not None and len(cells) > max_cells
+        if truncated:
+            densest = np.sort(np.argpartition(-cell_counts, max_cells - 1)[:max_cells])
+            cells, cell_counts = cells[densest], cell_counts[densest]
+        bounds = cell_bounds(cells, precision)
+
+        return {
+            'zoom': zoom,
+            'precision': precision,
+            'total': total,
+            'max': int(cell_counts.max()) if len(cell_counts) else 0,
+            'truncated': bool(truncated),
+            'cells': [{
+                'geohash': cell_geohash(int(key), precision),
+                'bounds': [float(v) for v in row],
+                'center': [
+                    float((row[0] + row[2]) / 2),
+                    float((row[1] + row[3]) / 2)
+                ],
+                'count': int(count)
+            } for key, count, row in zip(cells, cell_counts, bounds)]
+        }
+
+
+# Global sighting index
+sightings = SightingIndex()
+
+
+def parse_sighting(record) -> Tuple[float, float, int]:
+    """Validate one sighting record and return (lat, lon, animal_id)."""
+    if not isinstance(record, dict):
+        raise ValueError('sighting must be an object')
+    try:
+        lat = float(record['lat'])
+        lon = float(record['lon'])
+        animal_id = int(record.get('animal_id') or 0)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f'invalid sighting: {e}') from e
+    if abs(lat) > 90.0 or abs(lon) > 180.0:
+        raise ValueError('sighting coordinates out of range')
+    return lat, lon, animal_id
+
+
+def load_sightings(path: str, batch_size: int = 100000) -> IngestReport:
+    """Stream sightings from a JSON array or JSONL file into the index."""
+    report = IngestReport(source=path)
+    batch: List[Tuple[float, float, int]] = []
+
+    def flush():
+        if batch:
+            lat, lon, animal_ids = zip(*batch)
+            report.loaded += sightings.add(lat, lon, animal_ids)
+            batch.clear()
+
+    for index, record in iter_source_records(path, report):
+        report.total += 1
+        try:
+            batch.append(parse_sighting(record))
+        except ValueError as e:
+            report.add_invalid(index, [str(e)])
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
+
+
+def append_sightings(path: str, parsed: List[Tuple[float, float, int]]) -> bool:
+    """Persist sightings by appending them to a JSONL sightings file.
+
+    Returns False when ``path`` is not a JSONL file (a JSON array cannot
+    be appended to cheaply); such sightings only live until restart.
+    """
+    if not path or not path.lower().endswith(JSONL_EXTENSIONS):
+        return False
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(
+            json.dumps({'lat': lat, 'lon': lon, 'animal_id': animal_id}) + '\n'
+            for lat, lon, animal_id in parsed
+        ))
+    return True
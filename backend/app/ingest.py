@@ -0,0 +1,329 @@
+import json
+import multiprocessing
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Fields every source record must provide, and their expected type
+ANIMAL_SCHEMA: Dict[str, type] = {
+    'Common Name': str,
+    'Scientific Name': str,
+    'Type': str,
+    'Region': str,
+    'Habitat': str,
+    'Risk Level': str,
+    'Description': str
+}
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+class IngestError(Exception):
+    """Raised when a source file cannot be parsed at all."""
+
+
+class IngestReport:
+    """Summary of one ingest run.
+
+    Only counts and a bounded sample of problems are kept, so the report
+    stays small no matter how large the source file is.
+    """
+
+    def __init__(self, source: str = '', max_samples: int = 20):
+        self.source = source
+        self.max_samples = max_samples
+        self.total = 0
+        self.loaded = 0
+        self.invalid_count = 0
+        self.invalid_samples: List[dict] = []
+        self.missing_photo_count = 0
+        self.missing_photo_samples: List[str] = []
+        self.invalid_photo_count = 0
+        self.invalid_photo_samples: List[dict] = []
+
+    def add_invalid(self, index: int, errors: List[str]):
+        self.invalid_count += 1
+        if len(self.invalid_samples) < self.max_samples:
+            self.invalid_samples.append({'index': index, 'errors': errors})
+
+    def add_missing_photo(self, name: str):
+        self.missing_photo_count += 1
+        if len(self.missing_photo_samples) < self.max_samples:
+            self.missing_photo_samples.append(name)
+
+    def add_invalid_photo(self, name: str, error: str):
+        self.invalid_photo_count += 1
+        if len(self.invalid_photo_samples) < self.max_samples:
+            self.invalid_photo_samples.append({'name': name, 'error': error})
+
+    def to_dict(self) -> dict:
+        return {
+            'source': self.source,
+            'total': self.total,
+            'loaded': self.loaded,
+            'invalid': self.invalid_count,
+            'invalid_samples': self.invalid_samples,
+            'missing_photos': self.missing_photo_count,
+            'missing_photo_samples': self.missing_photo_samples,
+            'invalid_photos': self.invalid_photo_count,
+            'invalid_photo_samples': self.invalid_photo_samples
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"Ingest of {self.source}: {self.loaded} loaded, "
+            f"{self.invalid_count} invalid, "
+            f"{self.missing_photo_count} without photo "
+            f"(out of {self.total} records), "
+            f"{self.invalid_photo_count} invalid photo files skipped"
+        ]
+        for sample in self.invalid_samples:
+            lines.append(f"  invalid record #{sample['index']}: {'; '.join(sample['errors'])}")
+        if self.missing_photo_samples:
+            lines.append(f"  missing photos: {', '.join(self.missing_photo_samples)}")
+        for sample in self.invalid_photo_samples:
+            lines.append(f"  invalid photo {sample['name']}: {sample['error']}")
+        hidden = (self.invalid_count - len(self.invalid_samples)) + \
+            (self.missing_photo_count - len(self.missing_photo_samples)) + \
+            (self.invalid_photo_count - len(self.invalid_photo_samples))
+        if hidden > 0:
+            lines.append(f"  ... and {hidden} more")
+        return '\n'.join(lines)
+
+
+# Characters that may continue a JSON number; a number decoded right up to
+# the end of the buffer may have been cut short by the chunk boundary
+_number_tail_re = re.compile(r'[0-9.eE+\-]*')
+
+
+def iter_json_array(fp, chunk_size: int = 64 * 1024) -> Iterator:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    The file is read in chunks and only the element currently being decoded
+    is held in memory. Trailing commas and data after the closing bracket
+    are rejected like ``json.load`` would.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+    expect_comma = False
+    after_comma = False
+
+    while True:
+        # Skip whitespace, refilling the buffer when it runs dry
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise IngestError('Unexpected end of file inside JSON array')
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        char = buf[pos]
+        if not started:
+            if char != '[':
+                raise IngestError('Source file is not a JSON array')
+            started = True
+            pos += 1
+            continue
+        if char == ']':
+            if after_comma:
+                raise IngestError('Trailing comma in JSON array')
+            # Only whitespace may follow the closing bracket
+            rest = buf[pos + 1:]
+            while True:
+                if rest.strip():
+                    raise IngestError('Unexpected data after the end of the JSON array')
+                rest = fp.read(chunk_size)
+                if not rest:
+                    return
+        if expect_comma:
+            if char != ',':
+                raise IngestError(f"Expected ',' between array elements, got {char!r}")
+            expect_comma = False
+            after_comma = True
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise IngestError(f'Invalid JSON in source file: {e}') from e
+            end = None
+
+        # Value may be truncated at the chunk boundary, read more and retry.
+        # Numbers are the only values that decode successfully from a prefix.
+        truncated = end is None or (not eof and (
+            end == len(buf) or (
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                and _number_tail_re.match(buf, end).end() == len(buf)
+            )
+        ))
+        if truncated:
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield value
+        pos = end
+        expect_comma = True
+        after_comma = False
+
+
+def _is_jsonl(path: str) -> bool:
+    return path.lower().endswith(JSONL_EXTENSIONS)
+
+
+def _decode_line(line: str):
+    """Decode one JSONL line, returning ``(record, errors)``."""
+    try:
+        return json.loads(line), []
+    except json.JSONDecodeError as e:
+        return None, [f'invalid JSON: {e.msg}']
+
+
+def iter_raw_records(path: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(index, item)`` pairs from a JSON array or JSONL file.
+
+    For JSONL the items are the undecoded lines, so decoding can happen in
+    worker processes; for a JSON array they are the decoded elements.
+    Blank lines are skipped without consuming an index.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if _is_jsonl(path):
+            index = 0
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield index, line
+                    index += 1
+        else:
+            yield from enumerate(iter_json_array(f))
+
+
+def iter_source_records(path: str, report: IngestReport) -> Iterator[Tuple[int, object]]:
+    """Yield ``(index, record)`` pairs from a JSON array or JSONL file.
+
+    Lines of a JSONL file that fail to decode are recorded in ``report``
+    and skipped; indexes keep counting so record ids stay stable.
+    """
+    jsonl = _is_jsonl(path)
+    for index, item in iter_raw_records(path):
+        if not jsonl:
+            yield index, item
+            continue
+        record, errors = _decode_line(item)
+        if errors:
+            report.total += 1
+            report.add_invalid(index, errors)
+        else:
+            yield index, record
+
+
+def validate_record(record) -> List[str]:
+    """Check a raw record against ANIMAL_SCHEMA and return a list of problems."""
+    if not isinstance(record, dict):
+        return [f'expected an object, got {type(record).__name__}']
+
+    errors = []
+    for field, expected in ANIMAL_SCHEMA.items():
+        if field not in record:
+            errors.append(f'missing field {field!r}')
+        elif not isinstance(record[field], expected):
+            errors.append(f'field {field!r} should be {expected.__name__}')
+    if not errors and not record['Common Name'].strip():
+        errors.append("field 'Common Name' is empty")
+    return errors
+
+
+def normalize_record(index: int, record: dict) -> dict:
+    """Map a validated source record to the API representation (without photo)."""
+    return {
+        'id': index + 1,
+        'name': record['Common Name'].strip(),
+        'scientific_name': record['Scientific Name'],
+        'risk_level': record['Risk Level'].split('(')[0].strip(),
+        'description': record['Description'],
+        'type': record['Type'],
+        'region': record['Region'],
+        'habitat': record['Habitat']
+    }
+
+
+def _process_batch(batch: List[Tuple[int, object]], raw: bool) -> List[Tuple[int, Optional[dict], List[str]]]:
+    """Decode (JSONL lines), validate and normalize a batch of records.
+
+    Runs in worker processes, so the parent only has to split lines and
+    send strings.
+    """
+    results = []
+    for index, record in batch:
+        errors = []
+        if raw:
+            record, errors = _decode_line(record)
+        if not errors:
+            errors = validate_record(record)
+        results.append((index, None if errors else normalize_record(index, record), errors))
+    return results
+
+
+def _batches(records: Iterator[Tuple[int, object]], batch_size: int) -> Iterator[List[Tuple[int, object]]]:
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_animals(path: str, report: IngestReport, workers: int = 0,
+                   batch_size: int = 1000) -> Iterator[dict]:
+    """Stream normalized animals from ``path`` in source order.
+
+    Invalid records are counted in ``report`` instead of being yielded.
+    For JSONL sources with ``workers > 1``, raw lines are sent to a process
+    pool which decodes, validates and normalizes them; only a bounded number
+    of batches is in flight, so memory use does not grow with the file.
+    A JSON array has to be tokenized sequentially to find its elements, so
+    it is always processed in-process.
+
+    The pool uses the ``spawn`` start method: loads run inside a threaded
+    server process, and forking one can deadlock on locks held by other
+    threads.
+    """
+    raw = _is_jsonl(path)
+    batches = _batches(iter_raw_records(path), batch_size)
+
+    def consume(results):
+        for index, animal, errors in results:
+            report.total += 1
+            if errors:
+                report.add_invalid(index, errors)
+            else:
+                yield animal
+
+    if workers > 1 and not raw:
+        print(f"Ingest workers are ignored for JSON array source {path}; convert it to JSONL to parse in parallel")
+
+    if workers <= 1 or not raw:
+        for batch in batches:
+            yield from consume(_process_batch(batch, raw))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_process_batch, batch, raw))
+            if len(pending) >= workers * 2:
+                yield from consume(pending.popleft().result())
+        while pending:
+            yield from consume(pending.popleft().result())
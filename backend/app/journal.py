@@ -0,0 +1,130 @@
+import bisect
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+# Where a journaled record lives: the JSON dataset catalog or the database
+SOURCE_CATALOG = 'catalog'
+SOURCE_DB = 'db'
+
+
+class ChangeJournal:
+    """Append-only log of record changes with a monotonically increasing version.
+
+    Entries only hold ``(version, op, source, id)``; the current record is
+    looked up when a client syncs, so the journal never pins evicted
+    datasets in memory. Versions start from the current time in
+    milliseconds, so they keep increasing across restarts and clients
+    holding a version from a previous process are told to reset.
+
+    The journal lives in this process's memory. With several worker
+    processes each one keeps its own journal and versions, so clients
+    must be pinned to one worker (or will see resets when they switch).
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.version = int(time.time() * 1000)
+        # Oldest version a client may sync from without a reset
+        self.min_version = self.version
+        self._versions: List[int] = []
+        self._entries: List[Tuple[int, str, str, int]] = []
+
+    def record(self, upserts: Iterable[int] = (), deletes: Iterable[int] = (),
+               source: str = SOURCE_CATALOG) -> int:
+        """Append one change set under a new version and return that version."""
+        upserts, deletes = list(upserts), list(deletes)
+        with self._lock:
+            if not upserts and not deletes:
+                return self.version
+            self.version += 1
+            for op, ids in ((UPSERT, upserts), (DELETE, deletes)):
+                for record_id in ids:
+                    self._versions.append(self.version)
+                    self._entries.append((self.version, op, source, record_id))
+            self._trim()
+            return self.version
+
+    def invalidate(self) -> int:
+        """Start a new version that no earlier version can sync from.
+
+        Used when records changed but which ones is unknown; every client
+        is told to reset on its next sync.
+        """
+        with self._lock:
+            self.version += 1
+            self.min_version = self.version
+            self._versions.clear()
+            self._entries.clear()
+            return self.version
+
+    def _trim(self):
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        # Drop whole versions so a client never sees half a change set
+        cut = bisect.bisect_right(self._versions, self._versions[overflow - 1])
+        self.min_version = self._versions[cut - 1]
+        del self._versions[:cut]
+        del self._entries[:cut]
+
+    def changes_since(self, since: int) -> Tuple[int, bool, Dict[Tuple[str, int], str]]:
+        """Return ``(version, reset, changes)`` for a client at version ``since``.
+
+        ``changes`` maps ``(source, id)`` to the latest op after ``since``.
+        ``reset`` is True when the journal no longer covers ``since`` and
+        the client has to refetch everything.
+        """
+        with self._lock:
+            if since < self.min_version or since > self.version:
+                return self.version, True, {}
+            start = bisect.bisect_right(self._versions, since)
+            changes = {}
+            for _, op, source, record_id in self._entries[start:]:
+                changes[(source, record_id)] = op
+            return self.version, False, changes
+
+
+class RecordFingerprints:
+    """Per-record content hashes of one dataset, for diffing reloads.
+
+    Kept as two sorted int64 arrays, so ``nbytes`` is exact and the
+    fingerprints can be counted (and evicted) with the dataset they
+    belong to. ``digest`` summarizes them in a few bytes that can outlive
+    an eviction.
+    """
+
+    def __init__(self, records: Iterable[dict]):
+        pairs = sorted((record['id'], hash(json.dumps(record, sort_keys=True))) for record in records)
+        self.ids = np.array([record_id for record_id, _ in pairs], dtype=np.int64)
+        self.values = np.array([value for _, value in pairs], dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.values.nbytes
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.ids.tobytes() + self.values.tobytes()).hexdigest()
+
+    def changes_since(self, previous: 'RecordFingerprints') -> Tuple[List[int], List[int]]:
+        """Return ``(upserts, deletes)`` turning ``previous`` into these records."""
+        pos = np.searchsorted(previous.ids, self.ids)
+        unchanged = np.zeros(len(self.ids), dtype=bool)
+        known = pos < len(previous.ids)
+        unchanged[known] = (previous.ids[pos[known]] == self.ids[known]) & \
+            (previous.values[pos[known]] == self.values[known])
+        deletes = np.setdiff1d(previous.ids, self.ids, assume_unique=True)
+        return self.ids[~unchanged].tolist(), deletes.tolist()
+
+
+# Global change journal
+journal = ChangeJournal()
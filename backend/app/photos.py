@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff')
+
+# Extension used when publishing an image, by detected format. Pillow
+# reports multi-picture JPEGs from cameras and phones as MPO; browsers
+# display them as plain JPEGs (the first picture).
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg', 'MPO': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp', 'BMP': '.bmp',
+    'TIFF': '.tif'
+}
+
+# Bumped whenever validation rules change, so cached verdicts are redone
+MANIFEST_VERSION = 2
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an animal or file name for matching.
+
+    Accents are stripped, apostrophes of any kind are dropped and other
+    punctuation becomes a single space, so "Coquerel’s Sifaka",
+    "coquerel's sifaka" and "Coquerels-Sifaka" all match.
+    """
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"['’‘`´]", '', name.lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inspect_image(path: str, known: Optional[Dict[str, dict]] = None) -> dict:
+    """Hash a file and read its image header; runs in worker threads.
+
+    When ``known`` already has an entry with the same content hash, its
+    header fields are reused instead of opening the image again.
+    """
+    info = {'hash': hash_file(path), 'valid': False, 'error': None,
+            'format': None, 'width': None, 'height': None}
+    same = known.get(info['hash']) if known else None
+    if same is not None:
+        info.update({field: same[field] for field in ('valid', 'error', 'format', 'width', 'height')})
+        return info
+    try:
+        # Image.open only parses the header, the pixel data is not decoded
+        with Image.open(path) as image:
+            info['format'] = image.format
+            info['width'], info['height'] = image.size
+        info['valid'] = info['format'] in FORMAT_EXTENSIONS and info['width'] > 0 and info['height'] > 0
+        if not info['valid']:
+            info['error'] = f"unsupported image {info['format']} {info['width']}x{info['height']}"
+    except Exception as e:
+        info['error'] = str(e)
+    return info
+
+
+class PhotoManifest:
+    """Persistent record of every photo seen, keyed by file path.
+
+    Each entry holds the file's size and mtime, its SHA-256 content hash
+    and the validated image header. A scan only re-inspects files whose
+    size or mtime changed. Published copies are named after the content
+    hash, so identical images are stored once.
+
+    ``by_hash`` indexes entries by content hash: a changed or new file
+    still has to be hashed, but when its content was seen before (a copy,
+    a rename, a touched file) the stored header is reused instead of
+    parsing the image again.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: int = 4):
+        self.path = path
+        self.workers = workers
+        self.files: Dict[str, dict] = {}
+        self.by_hash: Dict[str, dict] = {}
+        # Datasets may load concurrently; scans and saves are serialized
+        self._lock = threading.Lock()
+
+    def load(self):
+        self.files = {}
+        self.by_hash = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.files = data.get('files', {})
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable photo manifest {self.path}: {e}")
+        self.by_hash = {entry['hash']: entry for entry in self.files.values()}
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def scan(self, photos_dir: str) -> List[dict]:
+        """Bring the entries for ``photos_dir`` up to date and return them."""
+        with self._lock:
+            return self._scan(photos_dir)
+
+    def _scan(self, photos_dir: str) -> List[dict]:
+        photos_dir = os.path.abspath(photos_dir)
+        current: Dict[str, os.stat_result] = {}
+        with os.scandir(photos_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    current[entry.path] = entry.stat()
+
+        # Forget files that disappeared from this directory
+        removed = [path for path in self.files
+                   if os.path.dirname(path) == photos_dir and path not in current]
+        for path in removed:
+            del self.files[path]
+
+        stale = [
+            path for path, stat in current.items()
+            if path not in self.files
+            or self.files[path]['size'] != stat.st_size
+            or self.files[path]['mtime'] != stat.st_mtime_ns
+        ]
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+                results = executor.map(lambda path: inspect_image(path, self.by_hash), stale)
+                for path, info in zip(stale, results):
+                    stat = current[path]
+                    self.files[path] = {
+                        'name': os.path.basename(path),
+                        'size': stat.st_size,
+                        'mtime': stat.st_mtime_ns,
+                        **info
+                    }
+        if stale or removed:
+            self.by_hash = {entry['hash']: entry for entry in self.files.values()}
+            self.save()
+
+        print(f"Photo manifest: {len(current)} photos in {photos_dir}, {len(stale)} inspected")
+        return [self.files[path] for path in current]
+
+    @staticmethod
+    def published_name(entry: dict) -> str:
+        return entry['hash'][:32] + FORMAT_EXTENSIONS[entry['format']]
+
+
+def photos_by_name(entries: List[dict], report=None) -> Dict[str, dict]:
+    """Index valid photos by normalized file stem.
+
+    When several files share a name (e.g. a .jpg and a .jpeg), the one with
+    the most pixels wins. Invalid photos are skipped and recorded in
+    ``report`` (an IngestReport) when one is given.
+    """
+    best: Dict[str, dict] = {}
+    for entry in entries:
+        if not entry['valid']:
+            if report is not None:
+                report.add_invalid_photo(entry['name'], entry['error'])
+            continue
+        key = normalize_name(os.path.splitext(entry['name'])[0])
+        current = best.get(key)
+        if current is None or entry['width'] * entry['height'] > current['width'] * current['height']:
+            best[key] = entry
+    return best
+
+
+def publish_photo(entry: dict, source_dir: str, dest_dir: str, published: set) -> str:
+    """Copy a photo to ``dest_dir`` under its content-hash name, once."""
+    filename = PhotoManifest.published_name(entry)
+    if filename not in published:
+        shutil.copy2(os.path.join(source_dir, entry['name']), os.path.join(dest_dir, filename))
+        published.add(filename)
+    return filename
@@ -0,0 +1,214 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Optional
+
+from flask import current_app, g, request
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Profile-Token'
+COLLAPSED_SUFFIX = '.collapsed'
+# Shorter sampling intervals would keep the sampler thread busy-spinning
+MIN_INTERVAL = 0.001
+
+
+def collapse_stack(frame) -> str:
+    """Format a frame and its callers as one collapsed-stack line (root first)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Statistical profiler sampling thread stacks from a background thread.
+
+    Every ``interval`` seconds the stacks of the watched threads (all other
+    threads when ``thread_ids`` is None) are collapsed and counted. The
+    profiled code is never instrumented, so overhead stays low and roughly
+    constant per sample.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None):
+        self.interval = max(interval, MIN_INTERVAL)
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'StackSampler':
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.counts
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.counts[collapse_stack(frame)] += 1
+            self.samples += 1
+
+
+def write_collapsed(counts: Counter, directory: str, prefix: str) -> str:
+    """Write counts in collapsed-stack format (flamegraph.pl / speedscope input)."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}{COLLAPSED_SUFFIX}"
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
+    return name
+
+
+def list_profiles(directory: str) -> List[dict]:
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith(COLLAPSED_SUFFIX):
+            path = os.path.join(directory, name)
+            profiles.append({'name': name, 'size': os.path.getsize(path), 'modified': os.path.getmtime(path)})
+    return profiles
+
+
+# Timing statistics for named spans: name -> {count, total, max, last}
+span_stats: Dict[str, Dict[str, float]] = {}
+_span_lock = threading.Lock()
+
+
+@contextmanager
+def span(name: str):
+    """Time a block of code and add it to span_stats."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _span_lock:
+            stats = span_stats.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            stats['last'] = elapsed
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+class WindowSampler:
+    """Holds the single process-wide sampler aggregating across requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sampler: Optional[StackSampler] = None
+        self.ends_at = 0.0
+        self.last_profile: Optional[str] = None
+
+    def start(self, seconds: float, interval: float, directory: str) -> bool:
+        with self._lock:
+            if self.sampler is not None and self.sampler.running:
+                return False
+            sampler = self.sampler = StackSampler(interval=interval).start()
+            self.ends_at = time.time() + seconds
+
+        def finish():
+            # Uses its own sampler; self.sampler may already belong to a newer window
+            counts = sampler.stop()
+            path = write_collapsed(counts, directory, 'window')
+            with self._lock:
+                self.last_profile = path
+            print(f"Profiling window finished: {sampler.samples} samples written to {path}")
+
+        timer = threading.Timer(seconds, finish)
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def status(self) -> dict:
+        sampler = self.sampler
+        running = sampler is not None and sampler.running
+        return {
+            'running': running,
+            'ends_at': self.ends_at if running else None,
+            'samples': sampler.samples if sampler else 0,
+            'last_profile': self.last_profile
+        }
+
+
+# Global window sampler
+window_sampler = WindowSampler()
+
+
+def _start_request_profile():
+    if request.headers.get(PROFILE_HEADER) != '1':
+        return
+    if not token_is_valid(request.headers.get(TOKEN_HEADER)):
+        return
+    g.profiler = StackSampler(
+        interval=current_app.config['PROFILING_INTERVAL'],
+        thread_ids=[threading.get_ident()]
+    ).start()
+
+
+def _finish_request_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    counts = profiler.stop()
+    prefix = f"request-{(request.endpoint or 'unknown').replace('.', '-')}"
+    response.headers['X-Profile-File'] = write_collapsed(counts, current_app.config['PROFILING_DIR'], prefix)
+    return response
+
+
+def _stop_request_profile(error=None):
+    # after_request is skipped on unhandled errors; never leave a sampler running
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+
+def token_is_valid(token: Optional[str]) -> bool:
+    expected = current_app.config.get('PROFILING_TOKEN')
+    # Compared as bytes: compare_digest rejects non-ASCII str arguments
+    return bool(expected and token and hmac.compare_digest(token.encode(), expected.encode()))
+
+
+def init_profiling(app):
+    """Register the per-request profiling hooks (only when PROFILING_ENABLED)."""
+    if not app.config.get('PROFILING_TOKEN'):
+        print("Warning: PROFILING_ENABLED is set without PROFILING_TOKEN; profiling stays off")
+        return
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    app.teardown_request(_stop_request_profile)
@@ -0,0 +1,343 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Weights of the similarity components; they sum to 1
+W_TEXT = 0.6
+W_TYPE = 0.15
+W_RISK = 0.1
+W_REGION = 0.15
+
+# Above this share of changed records an update falls back to a full build
+FULL_REBUILD_RATIO = 0.5
+
+# Upper bound on a (block x n) score matrix; blocks shrink as n grows
+SCORE_BLOCK_ELEMENTS = 1 << 22
+
+STOPWORDS = {
+    'and', 'are', 'but', 'for', 'from', 'has', 'have', 'its', 'the', 'this',
+    'that', 'which', 'with', 'was', 'were', 'also', 'can', 'into', 'only',
+    'currently', 'classified', 'listed', 'found', 'known', 'native'
+}
+
+_token_re = re.compile(r'[a-z]+')
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _token_re.findall(text.lower())
+            if len(token) > 2 and token not in STOPWORDS]
+
+
+def _document(animal: dict) -> List[str]:
+    return tokenize(f"{animal.get('description', '')} {animal.get('habitat', '')}")
+
+
+class SparseRows:
+    """Minimal CSR matrix of float32 rows, enough for TF-IDF vectors.
+
+    Descriptions use a few dozen of the vocabulary's terms, so storing
+    only the non-zeros keeps the text features at O(total terms) instead
+    of ``n x max_features`` without pulling in SciPy.
+    """
+
+    # Upper bound on the temporary (block x non-zeros) product in dot_t
+    CHUNK_ELEMENTS = 1 << 22
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_columns: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_columns = n_columns
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    @classmethod
+    def empty(cls, n_columns: int = 0) -> 'SparseRows':
+        return cls(np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                   np.empty(0, dtype=np.float32), n_columns)
+
+    @classmethod
+    def concat(cls, first: 'SparseRows', second: 'SparseRows') -> 'SparseRows':
+        return cls(
+            np.concatenate([first.indptr, second.indptr[1:] + first.indptr[-1]]),
+            np.concatenate([first.indices, second.indices]),
+            np.concatenate([first.data, second.data]),
+            first.n_columns
+        )
+
+    def take(self, rows: np.ndarray) -> 'SparseRows':
+        """The given rows, in order, as a new matrix."""
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[positions], self.data[positions], self.n_columns)
+
+    def dense(self, rows: np.ndarray) -> np.ndarray:
+        """The given rows as a dense (len(rows), n_columns) array."""
+        block = self.take(rows)
+        out = np.zeros((len(rows), self.n_columns), dtype=np.float32)
+        out[np.repeat(np.arange(len(rows)), np.diff(block.indptr)), block.indices] = block.data
+        return out
+
+    def dot_t(self, dense: np.ndarray) -> np.ndarray:
+        """``dense @ self.T`` for a dense (b, n_columns) block."""
+        out = np.zeros((len(dense), len(self)), dtype=np.float32)
+        if not len(dense) or not len(self.data):
+            return out
+        per_row = max(1, len(self.data) // max(len(self), 1))
+        step = max(1, self.CHUNK_ELEMENTS // (len(dense) * per_row))
+        for start in range(0, len(self), step):
+            stop = min(start + step, len(self))
+            lo, hi = self.indptr[start], self.indptr[stop]
+            if lo == hi:
+                continue
+            products = dense[:, self.indices[lo:hi]] * self.data[lo:hi]
+            offsets = self.indptr[start:stop] - lo
+            nonempty = np.flatnonzero(np.diff(self.indptr[start:stop + 1]) > 0)
+            out[:, start + nonempty] = np.add.reduceat(products, offsets[nonempty], axis=1)
+        return out
+
+
+class RelatedIndex:
+    """Precomputed top-k "related species" lists for one dataset.
+
+    Similarity mixes TF-IDF cosine over description and habitat text with
+    matches on type and risk level and the Jaccard overlap of region ids.
+    Text vectors are kept sparse; scores are computed with NumPy in row
+    blocks of at most ``block_size`` rows and SCORE_BLOCK_ELEMENTS
+    scores, so scoring memory stays bounded regardless of dataset size,
+    and lookups are O(k). ``nbytes`` is counted in the
+    owning dataset's size for the catalog's memory budget.
+    """
+
+    def __init__(self, k: int = 10, max_features: int = 2000, block_size: int = 1024):
+        self.k = k
+        self.max_features = max_features
+        self.block_size = block_size
+        self.ids = np.empty(0, dtype=np.int64)
+        self.rows: Dict[int, int] = {}
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.empty(0, dtype=np.float32)
+        self.text = SparseRows.empty()
+        self.types = np.empty(0, dtype=np.int32)
+        self.risks = np.empty(0, dtype=np.int32)
+        self.regions = np.empty((0, 0), dtype=np.float32)
+        self.region_columns: Dict[int, int] = {}
+        self.neighbor_ids = np.empty((0, 0), dtype=np.int64)
+        self.neighbor_scores = np.empty((0, 0), dtype=np.float32)
+        self._codes: Dict[str, Dict[str, int]] = {'type': {}, 'risk': {}}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.ids, self.idf, self.types, self.risks, self.regions,
+                  self.neighbor_ids, self.neighbor_scores)
+        return self.text.nbytes + sum(array.nbytes for array in arrays)
+
+    # Feature extraction
+
+    def _code(self, kind: str, value: str) -> int:
+        codes = self._codes[kind]
+        return codes.setdefault((value or '').strip().lower(), len(codes))
+
+    def _fit_vocabulary(self, documents: List[List[str]]):
+        df = Counter()
+        for document in documents:
+            df.update(set(document))
+        terms = [term for term, _ in df.most_common(self.max_features)]
+        self.vocabulary = {term: column for column, term in enumerate(terms)}
+        n = len(documents)
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + df[term])) + 1.0 for term in terms],
+            dtype=np.float32
+        )
+
+    def _text_features(self, documents: List[List[str]]) -> SparseRows:
+        indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+        indices: List[int] = []
+        data: List[float] = []
+        for row, document in enumerate(documents):
+            counts = Counter(token for token in document if token in self.vocabulary)
+            for token, count in counts.items():
+                indices.append(self.vocabulary[token])
+                data.append(1.0 + math.log(count))
+            indptr[row + 1] = len(indices)
+
+        indices = np.array(indices, dtype=np.int32)
+        data = np.array(data, dtype=np.float32) * self.idf[indices]
+        rows = np.repeat(np.arange(len(documents)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=len(documents)))
+        data /= norms[rows].astype(np.float32)
+        return SparseRows(indptr, indices, data, len(self.vocabulary))
+
+    def _features(self, animals: List[dict], region_ids: Dict[int, Set[int]]):
+        documents = [_document(animal) for animal in animals]
+        regions = np.zeros((len(animals), len(self.region_columns)), dtype=np.float32)
+        for row, animal in enumerate(animals):
+            for region_id in region_ids.get(animal['id'], ()):
+                regions[row, self.region_columns[region_id]] = 1.0
+        return (
+            self._text_features(documents),
+            np.array([self._code('type', animal.get('type')) for animal in animals], dtype=np.int32),
+            np.array([self._code('risk', animal.get('risk_level')) for animal in animals], dtype=np.int32),
+            regions
+        )
+
+    # Scoring
+
+    def _scores(self, rows: np.ndarray) -> np.ndarray:
+        """Similarity of the given rows against every row (self excluded)."""
+        scores = W_TEXT * self.text.dot_t(self.text.dense(rows))
+        scores += W_TYPE * (self.types[rows, None] == self.types[None, :])
+        scores += W_RISK * (self.risks[rows, None] == self.risks[None, :])
+        if self.regions.shape[1]:
+            overlap = self.regions[rows] @ self.regions.T
+            sizes = self.regions.sum(axis=1)
+            union = sizes[rows, None] + sizes[None, :] - overlap
+            scores += W_REGION * np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+    def _list_length(self) -> int:
+        """Neighbors per animal: k, or every other animal in small datasets."""
+        return min(self.k, max(len(self.ids) - 1, 0))
+
+    def _block_rows(self) -> int:
+        return max(1, min(self.block_size, SCORE_BLOCK_ELEMENTS // max(len(self.ids), 1)))
+
+    def _top_k(self, candidate_ids: np.ndarray, candidate_scores: np.ndarray,
+               k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep the k best (id, score) pairs of each row, best first."""
+        k = min(k, candidate_scores.shape[1])
+        if k == 0:
+            empty = np.empty((len(candidate_scores), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        part = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(candidate_scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind='stable')
+        best = np.take_along_axis(part, order, axis=1)
+        return (np.take_along_axis(candidate_ids, best, axis=1),
+                np.take_along_axis(candidate_scores, best, axis=1).astype(np.float32))
+
+    def _neighbors_for(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        k = self._list_length()
+        ids, scores = [], []
+        block_rows = self._block_rows()
+        for start in range(0, len(rows), block_rows):
+            block = rows[start:start + block_rows]
+            block_scores = self._scores(block)
+            block_ids, block_scores = self._top_k(
+                np.broadcast_to(self.ids, block_scores.shape), block_scores, k)
+            ids.append(block_ids)
+            scores.append(block_scores)
+        if not ids:
+            return np.empty((0, k), dtype=np.int64), np.empty((0, k), dtype=np.float32)
+        return np.concatenate(ids), np.concatenate(scores)
+
+    # Building
+
+    def build(self, animals: List[dict], region_ids: Dict[int, Set[int]]):
+        """Compute features and neighbor lists for every animal."""
+        self._codes = {'type': {}, 'risk': {}}
+        self.region_columns = {
+            region_id: column for column, region_id in
+            enumerate(sorted({r for ids in region_ids.values() for r in ids}))
+        }
+        self._fit_vocabulary([_document(animal) for animal in animals])
+        self.ids = np.array([animal['id'] for animal in animals], dtype=np.int64)
+        self.rows = {int(animal_id): row for row, animal_id in enumerate(self.ids)}
+        self.text, self.types, self.risks, self.regions = self._features(animals, region_ids)
+        self.neighbor_ids, self.neighbor_scores = self._neighbors_for(np.arange(len(animals)))
+
+    def update(self, animals: List[dict], region_ids: Dict[int, Set[int]],
+               changed: Iterable[int], deleted: Iterable[int]):
+        """Bring the index up to date after some records changed.
+
+        Only changed records are re-featurized (against the existing
+        vocabulary) and scored against the rest; their new scores are merged
+        into the other lists. Lists that lost a neighbor are recomputed.
+        """
+        changed, deleted = set(changed), set(deleted)
+        if not changed and not deleted:
+            return
+        known_regions = all(r in self.region_columns for ids in region_ids.values() for r in ids)
+        if not len(self.ids) or not known_regions or \
+                len(changed) + len(deleted) > FULL_REBUILD_RATIO * max(len(self.ids), 1):
+            self.build(animals, region_ids)
+            return
+
+        # Reuse feature rows of unchanged records, featurize the rest
+        ids = np.array([animal['id'] for animal in animals], dtype=np.int64)
+        old_rows = np.array([self.rows.get(int(animal_id), -1) if int(animal_id) not in changed else -1
+                             for animal_id in ids], dtype=np.int64)
+        fresh = np.flatnonzero(old_rows < 0)
+        text, types, risks, regions = self._features([animals[row] for row in fresh], region_ids)
+
+        kept = np.flatnonzero(old_rows >= 0)
+        text_rows = old_rows.copy()
+        text_rows[fresh] = len(self.text) + np.arange(len(fresh))
+        self.text = SparseRows.concat(self.text, text).take(text_rows)
+        for name, new_values in (('types', types), ('risks', risks), ('regions', regions)):
+            old_values = getattr(self, name)
+            values = np.zeros((len(ids),) + old_values.shape[1:], dtype=old_values.dtype)
+            values[kept] = old_values[old_rows[kept]]
+            values[fresh] = new_values
+            setattr(self, name, values)
+
+        old_neighbor_ids = self.neighbor_ids[old_rows[kept]]
+        old_neighbor_scores = self.neighbor_scores[old_rows[kept]]
+        self.ids = ids
+        self.rows = {int(animal_id): row for row, animal_id in enumerate(ids)}
+
+        k = self._list_length()
+        neighbor_ids = np.full((len(ids), k), -1, dtype=np.int64)
+        neighbor_scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+
+        # Unchanged lists that pointed at a changed or deleted record must be recomputed
+        stale = np.isin(old_neighbor_ids, list(changed | deleted)).any(axis=1) | \
+            (old_neighbor_ids.shape[1] < k)
+        dirty = np.concatenate([fresh, kept[stale]])
+        clean = kept[~stale]
+
+        if len(dirty):
+            neighbor_ids[dirty], neighbor_scores[dirty] = self._neighbors_for(dirty)
+
+        if len(clean):
+            # Merge the fresh records' scores into the clean lists, one block at a time
+            clean_ids, clean_scores = old_neighbor_ids[~stale][:, :k], old_neighbor_scores[~stale][:, :k]
+            block_rows = self._block_rows()
+            for start in range(0, len(fresh), block_rows):
+                block = fresh[start:start + block_rows]
+                block_scores = self._scores(block)[:, clean].T
+                clean_ids, clean_scores = self._top_k(
+                    np.concatenate([clean_ids, np.broadcast_to(ids[block], block_scores.shape)], axis=1),
+                    np.concatenate([clean_scores, block_scores], axis=1),
+                    k
+                )
+            neighbor_ids[clean], neighbor_scores[clean] = clean_ids, clean_scores
+
+        self.neighbor_ids, self.neighbor_scores = neighbor_ids, neighbor_scores
+
+    def related(self, animal_id: int, k: Optional[int] = None) -> Optional[List[Tuple[int, float]]]:
+        """Return up to k (id, score) pairs, or None if the animal is unknown."""
+        row = self.rows.get(animal_id)
+        if row is None:
+            return None
+        k = self.k if k is None else min(k, self.k)
+        return [
+            (int(neighbor_id), float(score))
+            for neighbor_id, score in zip(self.neighbor_ids[row, :k], self.neighbor_scores[row, :k])
+            if neighbor_id >= 0 and np.isfinite(score)
+        ]
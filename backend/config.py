@@ -8,6 +8,9 @@ class Config:
     # Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     
+    # Read-only serving: no database, migrations, auth or write routes
+    READ_ONLY = os.environ.get('READ_ONLY', 'false').lower() == 'true'
+    
     # Database - Using SQLite as default
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
@@ -22,4 +25,43 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'app/static/uploads')
     
     # API
-    ITEMS_PER_PAGE = 10 
\ No newline at end of file
+    ITEMS_PER_PAGE = 10
+    
+    # Dataset catalog: optional JSON file listing datasets (shards); when
+    # unset only the bundled Madagascar dataset is served
+    CATALOG_FILE = os.environ.get('CATALOG_FILE')
+    # Unload least recently used datasets above this size (0 = unlimited)
+    CATALOG_MEMORY_BUDGET_MB = int(os.environ.get('CATALOG_MEMORY_BUDGET_MB', 0))
+    
+    # Change journal entries kept for /api/sync; older clients must refetch
+    SYNC_JOURNAL_MAX_ENTRIES = int(os.environ.get('SYNC_JOURNAL_MAX_ENTRIES', 100000))
+    
+    # Profiling: per-request (X-Profile: 1) and windowed stack sampling,
+    # only available with a matching X-Profile-Token
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+    # Relative paths are resolved against backend/ so send_from_directory
+    # does not depend on the working directory
+    PROFILING_DIR = os.path.join(basedir, os.environ.get('PROFILING_DIR') or 'profiles')
+    PROFILING_INTERVAL = float(os.environ.get('PROFILING_INTERVAL', 0.005))
+    PROFILING_MAX_WINDOW_SECONDS = int(os.environ.get('PROFILING_MAX_WINDOW_SECONDS', 300))
+    
+    # Number of precomputed neighbors per animal for /api/animals/<id>/related
+    RELATED_TOP_K = int(os.environ.get('RELATED_TOP_K', 10))
+    
+    # Photo manifest (content hashes and validated headers of source photos)
+    PHOTO_MANIFEST = os.path.join(basedir, os.environ.get('PHOTO_MANIFEST') or 'photo_manifest.json')
+    PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 4))
+    
+    # Data ingest (0 or 1 worker parses in-process)
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 0))
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 1000))
+    
+    # Sightings (JSON array or JSONL of {"lat", "lon", "animal_id"}) for the heatmap;
+    # sightings POSTed to the API are appended to it when it is JSONL
+    SIGHTINGS_FILE = os.environ.get('SIGHTINGS_FILE', '').strip() or None
+    if SIGHTINGS_FILE:
+        SIGHTINGS_FILE = os.path.join(basedir, SIGHTINGS_FILE)
+    # Zoom levels above this need a bbox, and responses keep the densest cells
+    HEATMAP_MAX_ZOOM_WITHOUT_BBOX = int(os.environ.get('HEATMAP_MAX_ZOOM_WITHOUT_BBOX', 8))
+    HEATMAP_MAX_CELLS = int(os.environ.get('HEATMAP_MAX_CELLS', 5000)) 
\ No newline at end of file
@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
-
+# `flask run` (FLASK_APP=run.py) finds the create_app factory. The app is
+# only built here when run directly, so ingest worker processes, which
+# re-import the main module under the spawn start method, do not build it.
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    app = create_app()
+    app.run(debug=True)
@@ -0,0 +1,14 @@
+from PIL import Image
+
+from app.photos import PhotoManifest, inspect_image
+
+
+def test_multi_picture_jpeg_is_valid(tmp_path):
+    path = tmp_path / 'lemur.jpg'
+    first, second = Image.new('RGB', (8, 6), 'red'), Image.new('RGB', (8, 6), 'blue')
+    first.save(path, format='MPO', save_all=True, append_images=[second])
+
+    info = inspect_image(str(path))
+    assert info['format'] == 'MPO'
+    assert info['valid'], info['error']
+    assert PhotoManifest.published_name(info).endswith('.jpg')
@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.similarity import RelatedIndex
+
+WORDS = [f'word{letter}{other}' for letter in 'abcdefgh' for other in 'abcdefgh']
+
+
+def make_animals(n, seed=0, offset=0):
+    rng = random.Random(seed)
+    return [{
+        'id': offset + i + 1,
+        'type': rng.choice(['Mammal', 'Bird', 'Reptile']),
+        'risk_level': rng.choice(['Endangered', 'Vulnerable']),
+        'description': ' '.join(rng.choices(WORDS, k=12)),
+        'habitat': ' '.join(rng.choices(WORDS, k=3))
+    } for i in range(n)]
+
+
+def region_ids_for(animals):
+    return {animal['id']: {animal['id'] % 3 + 1} for animal in animals}
+
+
+def brute_force_scores(index):
+    """Best-first neighbor scores of every row, computed without blocking."""
+    k = min(index.k, len(index.ids) - 1)
+    scores = index._scores(np.arange(len(index.ids)))
+    return -np.sort(-scores, axis=1)[:, :k]
+
+
+def assert_valid(index, animals):
+    ids = {animal['id'] for animal in animals}
+    expected = min(index.k, len(animals) - 1)
+    for animal in animals:
+        related = index.related(animal['id'])
+        assert len(related) == expected
+        assert all(neighbor_id in ids and neighbor_id != animal['id'] for neighbor_id, _ in related)
+        assert all(np.isfinite(score) for _, score in related)
+
+
+@pytest.mark.parametrize('n', [1, 2, 5, 10, 11])
+def test_build_with_at_most_k_animals(n):
+    animals = make_animals(n)
+    index = RelatedIndex(k=10)
+    index.build(animals, region_ids_for(animals))
+    assert_valid(index, animals)
+
+
+@pytest.mark.parametrize('n', [3, 10])
+def test_update_with_at_most_k_animals(n):
+    animals = make_animals(n)
+    index = RelatedIndex(k=10)
+    index.build(animals, region_ids_for(animals))
+
+    animals[0] = {**animals[0], 'type': 'Amphibian'}
+    index.update(animals, region_ids_for(animals), changed=[animals[0]['id']], deleted=[])
+    assert_valid(index, animals)
+
+    removed = animals.pop()
+    index.update(animals, region_ids_for(animals), changed=[], deleted=[removed['id']])
+    assert_valid(index, animals)
+
+
+def test_update_matches_full_rebuild():
+    animals = make_animals(200)
+    index = RelatedIndex(k=5, block_size=16)
+    index.build(animals, region_ids_for(animals))
+
+    # Type and risk changes keep the vocabulary, so a rebuild must agree exactly
+    changed = [3, 50, 121]
+    for row in changed:
+        animals[row] = {**animals[row], 'type': 'Amphibian', 'risk_level': 'Extinct'}
+    index.update(animals, region_ids_for(animals), changed=[animals[row]['id'] for row in changed], deleted=[])
+
+    rebuilt = RelatedIndex(k=5)
+    rebuilt.build(animals, region_ids_for(animals))
+    assert np.allclose(index.neighbor_scores, rebuilt.neighbor_scores, atol=1e-6)
+    assert_valid(index, animals)
+
+
+def test_update_keeps_exact_top_k_for_its_features():
+    animals = make_animals(150, seed=1)
+    index = RelatedIndex(k=7, block_size=8)
+    index.build(animals, region_ids_for(animals))
+
+    deleted = [animals.pop(10)['id'], animals.pop(20)['id']]
+    animals[5] = {**animals[5], 'description': ' '.join(WORDS[:12])}
+    added = make_animals(3, seed=2, offset=1000)
+    animals.extend(added)
+    index.update(animals, region_ids_for(animals),
+                 changed=[animals[5]['id']] + [animal['id'] for animal in added], deleted=deleted)
+
+    assert_valid(index, animals)
+    assert np.allclose(index.neighbor_scores, brute_force_scores(index), atol=1e-6)